@@ -0,0 +1,317 @@
+"""
+Asyncio-native serving mode for the movie API.
+
+The holiday routes are answered by native async views that download
+holidays with an httpx.AsyncClient, so a slow nolaborables response
+only parks a coroutine instead of a worker thread. Every other route
+is delegated to the Flask app in main.py through asgiref's
+WsgiToAsgi adapter, so both serving modes expose the same API.
+
+Example usage:
+    uvicorn asgi:application
+"""
+import asyncio
+import json
+import math
+import time
+from datetime import date
+from urllib.parse import parse_qs
+
+import httpx
+from asgiref.wsgi import WsgiToAsgi
+from werkzeug.datastructures import MultiDict
+
+import proximo_feriado
+from holiday_client import CONNECT_TIMEOUT, POOL_SIZE, READ_TIMEOUT, RETRIES, CircuitOpenError, holiday_client
+from main import (PREFETCH_HOLIDAYS, InvalidPageArgs, admission, app, holiday_batch_error, holiday_prefetcher,
+                  next_holidays, peliculas, query_calendar, rate_limiter, read_calendar_query, recommend_by_genre,
+                  request_count, request_latency, split_list)
+from proximo_feriado import NextHoliday
+
+# NOTE - lo que puede fallar al hablar con nolaborables; como en las
+# vistas de Flask, cualquier otro error es un bug y responde 500
+UPSTREAM_ERRORS = (httpx.HTTPError, CircuitOpenError, json.JSONDecodeError)
+
+
+class AsyncHolidaySource:
+    """
+    Async counterpart of HolidayCache.get.
+
+    It shares the process-wide holiday_cache with the WSGI views and
+    only downloads a year when the cache has none or it has expired.
+    Concurrent misses for a year await the same task, and expired
+    years are served while a background task refreshes them. Calls go
+    through the same circuit breaker and latency stats as the
+    synchronous HolidayClient.
+    """
+
+    def __init__(self, client=None):
+        self.client = client
+        self._tasks = {}
+
+    async def get(self, year):
+        timeline, fresh = proximo_feriado.holiday_cache.peek(year)
+        if timeline is not None:
+            if not fresh:
+                self._download(year)
+            return timeline
+        return await asyncio.shield(self._download(year))
+
+    async def aclose(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    def _download(self, year):
+        task = self._tasks.get(year)
+        if task is None:
+            task = self._tasks[year] = asyncio.ensure_future(self._fetch(year))
+            task.add_done_callback(lambda done: self._forget(year, done))
+        return task
+
+    def _forget(self, year, task):
+        self._tasks.pop(year, None)
+        if not task.cancelled():
+            # NOTE - marcamos el error como leido aunque nadie espere
+            # el refresco en segundo plano
+            task.exception()
+
+    async def _fetch(self, year):
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+                limits=httpx.Limits(max_keepalive_connections=POOL_SIZE),
+                transport=httpx.AsyncHTTPTransport(retries=RETRIES),
+            )
+        try:
+            holiday_client.breaker.before_call()
+        except CircuitOpenError:
+            holiday_client.stats.record_rejected()
+            raise
+
+        start = asyncio.get_running_loop().time()
+        try:
+            response = await self.client.get(proximo_feriado.get_url(year))
+            response.raise_for_status()
+            holidays = response.json()
+        except Exception:
+            holiday_client.stats.record(asyncio.get_running_loop().time() - start, ok=False)
+            holiday_client.breaker.record_failure()
+            raise
+        holiday_client.stats.record(asyncio.get_running_loop().time() - start, ok=True)
+        holiday_client.breaker.record_success()
+        return proximo_feriado.holiday_cache.store(year, holidays)
+
+
+class _Years:
+    # NOTE - "cache" ya resuelto para NextHoliday, asi set_next no bloquea
+    def __init__(self, timelines):
+        self.timelines = timelines
+
+    def get(self, year):
+        return self.timelines[year]
+
+
+async def next_holiday(source, h_type=None):
+    """
+    Return the next holiday, optionally of a given type.
+
+    Next year's holidays are only awaited when nothing is left this
+    year, before NextHoliday rolls over to them, so set_next never
+    blocks.
+
+    Args:
+        source (AsyncHolidaySource): Where holidays are read from.
+        h_type (str, optional): The holiday type to look for.
+
+    Returns:
+        dict | str: The holiday, or NextHoliday's message when there
+        is none of that type.
+    """
+    today = date.today()
+    timelines = {today.year: await source.get(today.year)}
+    if timelines[today.year].next_after(today.month, today.day, h_type) is None:
+        timelines[today.year + 1] = await source.get(today.year + 1)
+    holiday = NextHoliday(_Years(timelines))
+    holiday.set_next(timelines[today.year], h_type)
+    return holiday.holiday
+
+
+async def film_for_holiday(source, args):
+    """
+    Async version of main.film_for_holiday.
+
+    Query Parameters:
+        genre (str): The genre of the recommended movie.
+
+    Returns:
+        tuple[dict, int]: The response body and its status code.
+    """
+    genre = args.get("genre")
+    if not genre:
+        return {"error": "Missing parameters genre"}, 404
+    return await _recommend(source, genre, None)
+
+
+async def film_for_holiday_type(source, args):
+    """
+    Async version of main.film_for_holiday_type.
+
+    Query Parameters:
+        genre (str): The genre of the recommended movie.
+        h_type (str): The holiday type to look for.
+
+    Returns:
+        tuple[dict, int]: The response body and its status code.
+    """
+    genre = args.get("genre")
+    h_type = args.get("h_type")
+    if not genre:
+        return {"error": "Missing parameters genre"}, 404
+    if not h_type:
+        return {"error": "Missing parameters h_type"}, 404
+    return await _recommend(source, genre, h_type)
+
+
+async def _recommend(source, genre, h_type):
+    movie = peliculas.random_by_genre(genre)
+    if movie is None:
+        return {"error": "No movies found for that genre"}, 404
+    holiday = await next_holiday(source, h_type)
+    return {"feriado": holiday, "pelicula": movie}, 200
+
+
+async def film_for_holiday_batch(source, args):
+    """
+    Async version of main.film_for_holiday_batch.
+
+    Query Parameters:
+        genres (str): Comma-separated genres, possibly repeated.
+        h_types (str): Comma-separated holiday types, possibly repeated.
+
+    Returns:
+        tuple[dict, int]: The response body and its status code.
+    """
+    genres = split_list(args.getlist("genres"))
+    h_types = split_list(args.getlist("h_types"))
+    error = holiday_batch_error(genres, h_types)
+    if error is not None:
+        return error
+
+    today = date.today()
+    timelines = {today.year: await source.get(today.year)}
+    if any(timelines[today.year].next_after(today.month, today.day, h_type) is None for h_type in h_types):
+        timelines[today.year + 1] = await source.get(today.year + 1)
+    holidays = next_holidays(h_types, _Years(timelines))
+    return {"feriados": holidays, "peliculas": recommend_by_genre(genres, h_types)}, 200
+
+
+async def get_holiday_calendar(source, args):
+    """
+    Async version of main.get_holiday_calendar.
+
+    Every year the query may touch is awaited before the calendar is
+    read, so it never blocks.
+
+    Returns:
+        tuple[dict, int]: The response body and its status code.
+    """
+    try:
+        query = read_calendar_query(args)
+    except InvalidPageArgs as error:
+        return {"error": str(error)}, 400
+    years = query.years(date.today())
+    timelines = dict(zip(years, await asyncio.gather(*(source.get(year) for year in years))))
+    return {"feriados": query_calendar(query, _Years(timelines))}, 200
+
+
+ASYNC_ROUTES = {
+    '/peliculas/holiday': film_for_holiday,
+    '/peliculas/holiday_type': film_for_holiday_type,
+    '/peliculas/holiday_batch': film_for_holiday_batch,
+    '/feriados': get_holiday_calendar,
+}
+
+
+def create_asgi_app(flask_app=app, source=None, prefetcher=None):
+    """
+    Build the ASGI application.
+
+    Args:
+        flask_app (Flask, optional): The app serving every non-async route.
+        source (AsyncHolidaySource, optional): Where the async views
+            read holidays from. A new one is created when omitted.
+        prefetcher (HolidayPrefetcher, optional): Started on lifespan
+            startup, before the first request, and stopped on shutdown.
+
+    Returns:
+        Callable: An ASGI 3 application.
+    """
+    wsgi = WsgiToAsgi(flask_app)
+    source = source if source is not None else AsyncHolidaySource()
+
+    async def application(scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await _lifespan(source, prefetcher, receive, send)
+            return
+        view = ASYNC_ROUTES.get(scope.get('path'))
+        if scope['type'] != 'http' or view is None or scope['method'] != 'GET':
+            await wsgi(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        # NOTE - como request.args: get() da el primer valor y getlist()
+        # todos los de un parametro repetido
+        args = MultiDict(parse_qs(scope['query_string'].decode('latin-1')))
+        headers = []
+        # NOTE - mismos limites y tope de concurrencia que las rutas de
+        # Flask, el endpoint se llama igual que la vista
+        retry_after = rate_limiter.check(view.__name__, (scope.get('client') or (None,))[0])
+        if retry_after:
+            body, status = {"error": "Too many requests"}, 429
+            headers.append((b'retry-after', str(math.ceil(retry_after)).encode()))
+        elif not admission.try_enter():
+            body, status = {"error": "Server busy"}, 503
+            headers.append((b'retry-after', b'1'))
+        else:
+            try:
+                body, status = await view(source, args)
+            except UPSTREAM_ERRORS:
+                body, status = {"error": "Holiday service unavailable"}, 503
+            except Exception:
+                flask_app.logger.exception('Exception on %s [GET]', scope['path'])
+                body, status = {"error": "Internal server error"}, 500
+            finally:
+                admission.leave()
+        payload = (flask_app.json.dumps(body) + '\n').encode()
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(payload)).encode()),
+            ] + headers,
+        })
+        await send({'type': 'http.response.body', 'body': payload})
+        request_latency.observe((view.__name__, 'GET'), time.perf_counter() - start)
+        request_count.inc((view.__name__, 'GET', str(status)))
+
+    return application
+
+
+async def _lifespan(source, prefetcher, receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            if prefetcher is not None:
+                await asyncio.to_thread(prefetcher.start)
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            if prefetcher is not None:
+                await asyncio.to_thread(prefetcher.stop)
+            await source.aclose()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+application = create_asgi_app(prefetcher=holiday_prefetcher if PREFETCH_HOLIDAYS else None)
@@ -0,0 +1,71 @@
+"""
+Memory benchmark of the movie record representation.
+
+Builds N records the way a bulk import does, with every title and
+genre string freshly parsed, and reports the bytes per movie of the
+old per-movie dicts against Movie records (slotted, with interned
+genres), plus the footprint of a full MovieCatalog including its
+indexes.
+
+Example usage:
+    python -m benchmarks.catalog_memory --movies 1000000
+"""
+import argparse
+import gc
+import json
+import tracemalloc
+
+from catalog import MovieCatalog
+from movie import Movie
+
+GENRES = ['Acción', 'Ciencia ficción', 'Drama', 'Comedia', 'Animación', 'Fantasía']
+
+
+def parsed_rows(count):
+    # NOTE - armamos strings nuevos por fila, como al parsear NDJSON/CSV
+    for id in range(1, count + 1):
+        yield id, f'Película número {id}', ''.join(GENRES[id % len(GENRES)])
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    kept = build()
+    end, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return end - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--movies', type=int, default=100000)
+    parser.add_argument('--output', help='also write the results as JSON to this file')
+    options = parser.parse_args()
+
+    count = options.movies
+    titles = measure(lambda: [titulo for _, titulo, _ in parsed_rows(count)])
+    cases = {
+        'dict_records': lambda: [
+            {'id': id, 'titulo': titulo, 'genero': genero} for id, titulo, genero in parsed_rows(count)],
+        'movie_records': lambda: [Movie(id, titulo, genero) for id, titulo, genero in parsed_rows(count)],
+        'catalog': lambda: MovieCatalog(
+            {'id': id, 'titulo': titulo, 'genero': genero} for id, titulo, genero in parsed_rows(count)),
+    }
+    results = {'config': vars(options), 'title_bytes_per_movie': round(titles / count, 1)}
+    for name, build in cases.items():
+        total = measure(build)
+        results[name] = {
+            'bytes_per_movie': round(total / count, 1),
+            'bytes_per_movie_without_titles': round((total - titles) / count, 1),
+        }
+        print(name, results[name])
+
+    if options.output:
+        with open(options.output, 'w') as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
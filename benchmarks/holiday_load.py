@@ -0,0 +1,156 @@
+"""
+Load benchmark of the holiday routes: WSGI (Flask's threaded
+app.run() server) against the ASGI serving mode in asgi.py (uvicorn).
+
+Both servers talk to a local fake nolaborables (fake_nolaborables.py)
+that replays the recorded holidays after --upstream-delay seconds, and
+can also inject errors (--error-rate) and timeouts (--timeout-rate). In the default "uncached" mode every request
+downloads the year again, so the benchmark measures how each serving
+mode copes with requests that wait on the upstream; "--cached" measures
+the normal configuration with the process-wide holiday cache.
+
+Example usage:
+    python -m benchmarks.holiday_load --requests 2000 --concurrency 200
+"""
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import threading
+import time
+
+import httpx
+import uvicorn
+from werkzeug.serving import make_server
+
+import proximo_feriado
+from asgi import AsyncHolidaySource, create_asgi_app
+from fake_nolaborables import FakeNolaborables
+from main import admission, app, rate_limiter
+from proximo_feriado import HolidayTimeline, download_holidays
+
+class Uncached:
+    # NOTE - cache que nunca guarda nada: cada request descarga el año
+    def get(self, year):
+        return HolidayTimeline(download_holidays(year), year)
+
+    def peek(self, year):
+        return None, False
+
+    def store(self, year, holidays):
+        return HolidayTimeline(holidays, year)
+
+
+class UncachedAsyncSource(AsyncHolidaySource):
+    async def get(self, year):
+        return await self._fetch(year)
+
+
+def start_wsgi():
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, server.server_port
+
+
+def start_asgi(source):
+    config = uvicorn.Config(create_asgi_app(source=source), host='127.0.0.1', port=0,
+                            log_level='warning', lifespan='on')
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    return server, thread, port
+
+
+async def drive(url, total, concurrency):
+    latencies = []
+    errors = 0
+    remaining = iter(range(total))
+
+    async def worker(client):
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            try:
+                response = await client.get(url)
+                ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return summarize(latencies, errors, elapsed)
+
+
+def summarize(latencies, errors, elapsed):
+    latencies.sort()
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'seconds': round(elapsed, 3),
+        'req_per_s': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(quantiles[49] * 1000, 2),
+        'p95_ms': round(quantiles[94] * 1000, 2),
+        'p99_ms': round(quantiles[98] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--upstream-delay', type=float, default=0.1)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--timeout-rate', type=float, default=0.0)
+    parser.add_argument('--cached', action='store_true')
+    parser.add_argument('--route', default='/peliculas/holiday?genre=Drama')
+    parser.add_argument('--output', help='also write the results as JSON to this file')
+    options = parser.parse_args()
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    # NOTE - medimos los modos de servir, no los limites de admision
+    rate_limiter.enabled = False
+    admission.max_concurrent = max(admission.max_concurrent, options.concurrency)
+
+    upstream = FakeNolaborables(latency=options.upstream_delay, error_rate=options.error_rate,
+                                timeout_rate=options.timeout_rate).start()
+    proximo_feriado.NOLABORABLES_BASE_URL = upstream.base_url
+
+    results = {'config': vars(options)}
+    for mode in ('wsgi', 'asgi'):
+        if options.cached:
+            proximo_feriado.holiday_cache = proximo_feriado.HolidayCache()
+            source = AsyncHolidaySource()
+        else:
+            proximo_feriado.holiday_cache = Uncached()
+            source = UncachedAsyncSource()
+
+        if mode == 'wsgi':
+            server, port = start_wsgi()
+        else:
+            server, thread, port = start_asgi(source)
+        url = f'http://127.0.0.1:{port}{options.route}'
+        results[mode] = asyncio.run(drive(url, options.requests, options.concurrency))
+        if mode == 'wsgi':
+            server.shutdown()
+        else:
+            server.should_exit = True
+            thread.join()
+        print(mode, results[mode])
+
+    if options.output:
+        with open(options.output, 'w') as output:
+            json.dump(results, output, indent=2)
+    upstream.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Microbenchmark of the JSON encoding of movie listings.
+
+Encodes the same list of N movies as a JSON array three ways: Flask's
+stdlib provider (what jsonify used before fast_json), FastJSONProvider
+(orjson when installed), and warm RecordFragments, which is what
+page_response does for repeated listings. The renumbered variant is
+the shape of the search endpoints.
+
+Example usage:
+    python -m benchmarks.json_encoding --movies 10000 --repeat 20
+"""
+import argparse
+import json
+import timeit
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+import fast_json
+from fast_json import FastJSONProvider, RecordFragments
+from movie import Movie
+
+GENRES = ['Acción', 'Ciencia ficción', 'Drama', 'Comedia', 'Animación', 'Fantasía']
+
+
+def make_movies(count):
+    return [
+        Movie(id, f'Película número {id}', GENRES[id % len(GENRES)])
+        for id in range(1, count + 1)
+    ]
+
+
+def measure(encode, repeat):
+    # NOTE - el mejor de varios intentos, el resto es ruido del sistema
+    return min(timeit.repeat(encode, number=1, repeat=repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--movies', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--output', help='also write the results as JSON to this file')
+    options = parser.parse_args()
+
+    movies = make_movies(options.movies)
+    stdlib = DefaultJSONProvider(Flask(__name__))
+    fast = FastJSONProvider(Flask(__name__))
+    fragments = RecordFragments(fast.dumps_bytes)
+    for movie in movies:
+        fragments.encode(movie)
+
+    # NOTE - los providers pagan tambien el to_dict() de cada registro,
+    # como jsonify de un listado del catalogo
+    cases = {
+        'stdlib_provider': lambda: stdlib.dumps([movie.to_dict() for movie in movies]).encode(),
+        'fast_provider': lambda: fast.dumps_bytes([movie.to_dict() for movie in movies]),
+        'fragments': lambda: b'[' + b','.join(fragments.encode(movie) for movie in movies) + b']',
+        'fragments_renumbered': lambda: b'[' + b','.join(
+            fragments.encode(movie, new_id) for new_id, movie in enumerate(movies, start=1)) + b']',
+    }
+    baseline = measure(cases['stdlib_provider'], options.repeat)
+    results = {'config': dict(vars(options), orjson=fast_json.orjson is not None)}
+    for name, encode in cases.items():
+        seconds = baseline if name == 'stdlib_provider' else measure(encode, options.repeat)
+        results[name] = {
+            'ms': round(seconds * 1000, 3),
+            'movies_per_s': round(options.movies / seconds),
+            'speedup': round(baseline / seconds, 2),
+        }
+        print(name, results[name])
+
+    if options.output:
+        with open(options.output, 'w') as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
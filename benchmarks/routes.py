@@ -0,0 +1,230 @@
+"""
+Load benchmark of every route in main.py.
+
+Seeds the catalog with growing numbers of movies (10^3 to 10^6) and,
+at each size, drives every registered route with concurrent clients,
+both through Flask's test client (the app alone) and through a real
+threaded HTTP server (the app plus the network stack). For every
+route it reports req/s and p50/p95/p99 latency, and --output writes
+all results as JSON, tagged with the current commit, so runs can be
+compared across commits.
+
+Holidays are the recordings in fixtures/, served from memory, and the
+rate limits are turned off, so the numbers measure the app, not
+nolaborables or the limiter.
+
+Example usage:
+    python -m benchmarks.routes --sizes 1000,10000,100000 --requests 500 --concurrency 8
+"""
+import argparse
+import json
+import logging
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from random import Random
+from typing import Callable, Dict, NamedTuple, Tuple
+
+import requests
+from werkzeug.serving import make_server
+
+import proximo_feriado
+from benchmarks.holiday_load import summarize
+from fake_nolaborables import load_recorded
+from main import admission, app, peliculas, rate_limiter
+
+GENRES = ['Acción', 'Ciencia ficción', 'Drama', 'Comedia', 'Animación', 'Fantasía', 'Terror', 'Crimen']
+WORDS = ['noche', 'ciudad', 'guerra', 'amor', 'tiempo', 'sombra', 'mar', 'fuego', 'viaje', 'regreso']
+BULK_ROWS = 20
+
+
+class Case(NamedTuple):
+    endpoint: str
+    method: str
+    # NOTE - devuelve (path, kwargs) para cada request; los kwargs
+    # (json, data, headers) sirven tanto al test client como a requests
+    make: Callable[[], Tuple[str, dict]]
+    ok: Tuple[int, ...] = (200,)
+    # NOTE - las rutas que recorren todo el catalogo reciben menos requests
+    share: float = 1.0
+
+
+def seed(target, random):
+    missing = target - len(peliculas)
+    if missing <= 0:
+        return
+    rows = [
+        (f'{random.choice(WORDS).title()} {random.choice(WORDS)} {n}', random.choice(GENRES))
+        for n in range(len(peliculas), target)
+    ]
+    for start in range(0, len(rows), 10000):
+        peliculas.add_many(rows[start:start + 10000])
+
+
+def build_cases(requests_per_route, random):
+    def any_id():
+        return peliculas.sample(1)[0].id
+
+    # NOTE - peliculas propias para borrar, asi DELETE siempre encuentra una
+    doomed = deque(movie.id for movie in peliculas.add_many(
+        ('Borrar', 'Benchmark') for _ in range(requests_per_route)))
+    bulk_body = ''.join(
+        json.dumps({'titulo': f'Bulk {n}', 'genero': random.choice(GENRES)}) + '\n' for n in range(BULK_ROWS))
+
+    return [
+        Case('get_all_movies', 'GET', lambda: ('/peliculas?limit=100', {})),
+        Case('get_all_movies', 'GET', lambda: ('/peliculas', {}), share=0.01),
+        Case('get_movie', 'GET', lambda: (f'/peliculas/{any_id()}', {})),
+        Case('add_movie', 'POST', lambda: ('/peliculas', {'json': {'titulo': 'Nueva', 'genero': random.choice(GENRES)}}),
+             ok=(201,)),
+        Case('update_movie', 'PUT',
+             lambda: (f'/peliculas/{any_id()}', {'json': {'titulo': 'Editada', 'genero': random.choice(GENRES)}})),
+        Case('remove_movie', 'DELETE', lambda: (f'/peliculas/{doomed.popleft()}', {})),
+        Case('get_movies_batch', 'GET',
+             lambda: ('/peliculas/batch?ids=' + ','.join(str(any_id()) for _ in range(50)), {})),
+        Case('import_movies', 'POST', lambda: ('/peliculas/bulk', {
+            'data': bulk_body.encode(), 'headers': {'Content-Type': 'application/x-ndjson'}}), ok=(201,), share=0.2),
+        Case('export_movies', 'GET', lambda: ('/peliculas/export?format=ndjson', {}), share=0.01),
+        Case('get_movie_by_genre', 'GET', lambda: (f'/peliculas/get_movie_by_genre?genre={random.choice(GENRES)}&limit=50', {})),
+        Case('get_movie_by_title_keyword', 'GET',
+             lambda: (f'/peliculas/get_movie_by_title_keyword?kw={random.choice(WORDS)}&limit=50', {})),
+        Case('get_search_cache_stats', 'GET', lambda: ('/peliculas/cache_stats', {})),
+        Case('get_metrics', 'GET', lambda: ('/metrics', {})),
+        Case('random_movie', 'GET', lambda: ('/peliculas/random', {})),
+        Case('random_movie', 'GET', lambda: ('/peliculas/random?n=10&weighted=1', {})),
+        Case('random_movie_by_genre', 'GET', lambda: (f'/peliculas/random_by_genre?genre={random.choice(GENRES)}', {})),
+        Case('film_for_holiday', 'GET', lambda: (f'/peliculas/holiday?genre={random.choice(GENRES)}', {})),
+        Case('film_for_holiday_type', 'GET',
+             lambda: (f'/peliculas/holiday_type?genre={random.choice(GENRES)}&h_type=inamovible', {})),
+        Case('get_holiday_calendar', 'GET', lambda: ('/feriados?n=10', {})),
+        Case('get_holiday_calendar', 'GET', lambda: ('/feriados?from=2025-06-01&to=2026-06-30&h_type=inamovible', {})),
+        Case('film_for_holiday_batch', 'GET',
+             lambda: ('/peliculas/holiday_batch?genres=' + ','.join(GENRES) + '&h_types=inamovible,trasladable,puente', {})),
+    ]
+
+
+class TestClientDriver:
+    name = 'test_client'
+
+    def session(self):
+        return app.test_client()
+
+    def send(self, session, method, path, kwargs):
+        return session.open(path, method=method, **kwargs).status_code
+
+
+class ServerDriver:
+    name = 'server'
+
+    def __init__(self):
+        self.server = make_server('127.0.0.1', 0, app, threaded=True)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f'http://127.0.0.1:{self.server.server_port}'
+
+    def session(self):
+        return requests.Session()
+
+    def send(self, session, method, path, kwargs):
+        return session.request(method, self.base_url + path, **kwargs).status_code
+
+    def close(self):
+        self.server.shutdown()
+
+
+def run_case(driver, case, total, concurrency):
+    latencies = []
+    paths = []
+    errors = 0
+    remaining = iter(range(total))
+    lock = threading.Lock()
+
+    def worker():
+        nonlocal errors
+        session = driver.session()
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    return
+                path, kwargs = case.make()
+                if not paths:
+                    paths.append(path)
+            start = time.perf_counter()
+            try:
+                ok = driver.send(session, case.method, path, kwargs) in case.ok
+            except requests.RequestException:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            if not ok:
+                with lock:
+                    errors += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, errors, time.perf_counter() - start), paths[0]
+
+
+def current_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', default='1000,10000,100000',
+                        help='comma-separated catalog sizes, e.g. 1000,10000,100000,1000000')
+    parser.add_argument('--requests', type=int, default=300, help='requests per route and size')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--drivers', default='test_client,server')
+    parser.add_argument('--route', action='append', help='only benchmark these endpoints')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='also write the results as JSON to this file')
+    options = parser.parse_args()
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    random = Random(options.seed)
+    rate_limiter.enabled = False
+    admission.max_concurrent = max(admission.max_concurrent, options.concurrency)
+    proximo_feriado.holiday_cache = proximo_feriado.HolidayCache(fetch=load_recorded)
+
+    endpoints = {rule.endpoint for rule in app.url_map.iter_rules()} - {'static'}
+    covered = {case.endpoint for case in build_cases(0, random)}
+    if endpoints - covered:
+        print('routes without a benchmark case:', ', '.join(sorted(endpoints - covered)), file=sys.stderr)
+
+    results = {'config': vars(options), 'commit': current_commit(), 'results': []}
+    for size in sorted(int(size) for size in options.sizes.split(',')):
+        seed(size, random)
+        for driver_name in options.drivers.split(','):
+            driver = TestClientDriver() if driver_name == 'test_client' else ServerDriver()
+            for case in build_cases(options.requests, random):
+                if options.route and case.endpoint not in options.route:
+                    continue
+                total = max(1, int(options.requests * case.share))
+                summary, path = run_case(driver, case, total, options.concurrency)
+                row: Dict[str, object] = {
+                    'size': size, 'driver': driver.name, 'route': case.endpoint, 'method': case.method, 'path': path,
+                }
+                row.update(summary)
+                results['results'].append(row)
+                print(f"{size:>8} {driver.name:<11} {case.method:<6} {row['path'][:60]:<60} "
+                      f"{summary['req_per_s']:>9} req/s  p50 {summary['p50_ms']:>8} ms  "
+                      f"p95 {summary['p95_ms']:>8} ms  p99 {summary['p99_ms']:>8} ms  errors {summary['errors']}")
+            if isinstance(driver, ServerDriver):
+                driver.close()
+
+    if options.output:
+        with open(options.output, 'w') as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
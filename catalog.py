@@ -0,0 +1,610 @@
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from bisect import bisect_right, insort
+from contextlib import contextmanager
+import threading
+import uuid
+from movie import Movie
+from sampling import DenseIndex
+from search import TitleIndex
+
+# NOTE - peliculas que iter_by_genre lee por vez con el lock tomado
+GENRE_CHUNK = 1000
+# NOTE - lo mismo para iter_title_matches
+TITLE_CHUNK = 1000
+
+
+class ReadWriteLock:
+    """
+    Lock that lets any number of readers in at once, or one writer.
+
+    Readers never wait for each other, only for a writer that holds or
+    is waiting for the lock; waiting writers go first so a steady
+    stream of reads cannot starve them.
+    """
+
+    def __init__(self) -> None:
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writing = False
+        self._waiting_writers = 0
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        with self._cond:
+            while self._writing or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writing or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writing = False
+                self._cond.notify_all()
+
+
+def _check(titulo: str, genero: str) -> None:
+    # NOTE - se valida antes de tomar el lock: una vez que _insert o
+    # update empiezan a tocar _by_id y los indices ya nada puede fallar
+    if not isinstance(titulo, str) or not isinstance(genero, str):
+        raise TypeError('titulo and genero must be strings')
+
+
+class MovieCatalog:
+    """
+    In-memory movie store indexed by movie ID.
+
+    Movies are kept in a dictionary keyed by their integer 'id', so
+    lookups, updates and deletes by ID take constant time no matter
+    how many movies the catalog holds. Since IDs are handed out in
+    increasing order, the dictionary's insertion order is also the
+    order in which movies are listed.
+
+    A secondary index keeps the sorted IDs of each casefolded genre,
+    so a page of a genre starting after any ID is a binary search plus
+    a slice, whatever the size of the genre or the catalog, and a
+    TitleIndex answers keyword searches over titles. The IDs of the
+    whole catalog and of each genre are also kept in DenseIndex
+    arrays, so random picks take constant time.
+
+    A sorted list of IDs lets readers resume a listing after any ID in
+    logarithmic time. Removed IDs are left in it as tombstones and
+    skipped when read, and the list is compacted once they make up
+    half of it.
+
+    The catalog is safe to share between threads. Writes, including ID
+    allocation, are serialized by a ReadWriteLock, while index reads
+    only take its shared side and never wait for each other. Stored
+    records are never mutated: an update replaces the movie's Movie
+    record with a new one, so a reader that is still serializing the
+    old record never sees half an update. Every write also bumps the catalog
+    version, from which etag() derives HTTP entity tags.
+
+    When a storage backend such as storage.SQLiteStorage is given,
+    every write is also saved to it, and the catalog is loaded from it
+    instead of from 'movies' unless it is still empty. Writes are
+    applied in memory before they are committed; if the storage drops
+    a write it could not commit, the catalog reloads itself from the
+    storage before its next write (or right away, for the writer that
+    was waiting on it), so memory never drifts from what is stored.
+
+    Args:
+        movies (Iterable[dict], optional): Initial movies, each with
+            'id', 'titulo' and 'genero' keys.
+        storage (optional): The storage backend. Defaults to keeping
+            the catalog in memory only.
+    """
+
+    def __init__(self, movies: Optional[Iterable[dict]] = None, storage=None) -> None:
+        self._reset()
+        self._next_id = 1
+        self._lock = ReadWriteLock()
+        self._version = 0
+        self._listeners: List[Callable[[List[Tuple[Optional[Movie], Optional[Movie]]]], None]] = []
+        # NOTE - distingue esta instancia de otras (reinicios, otros
+        # workers) que tambien cuentan versiones desde 0
+        self._epoch = uuid.uuid4().hex[:12]
+        self._storage = storage
+        self._storage_failures = storage.failures if storage is not None else 0
+        records = [Movie.from_dict(movie) for movie in movies or ()]
+        stored_next_id = 1
+        if storage is not None:
+            stored, stored_next_id = storage.load()
+            if stored or stored_next_id > 1:
+                records = stored
+            else:
+                storage.seed(records)
+        for movie in records:
+            self._insert(movie)
+        self._next_id = max(self._next_id, stored_next_id)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __iter__(self) -> Iterator[Movie]:
+        return iter(self.all())
+
+    def __contains__(self, id: object) -> bool:
+        return id in self._by_id
+
+    def all(self) -> List[Movie]:
+        """
+        Return every movie in the catalog, ordered by ID.
+
+        Returns:
+            List[Movie]: The stored movie records.
+        """
+        with self._lock.read():
+            return list(self._by_id.values())
+
+    def iter_from(self, after_id: int = 0) -> Iterator[Movie]:
+        """
+        Lazily yield the movies whose ID is greater than 'after_id',
+        ordered by ID.
+
+        The iteration holds no lock, so it may run for as long as a
+        streamed response needs. Movies added while iterating may or
+        may not be yielded, and removed movies are skipped.
+
+        Args:
+            after_id (int, optional): The ID to resume after.
+
+        Yields:
+            Movie: The stored movies.
+        """
+        order = self._order
+        for position in range(bisect_right(order, after_id), len(order)):
+            movie = self._by_id.get(order[position])
+            if movie is not None:
+                yield movie
+
+    def get(self, id: int) -> Optional[Movie]:
+        """
+        Return the movie with the given ID.
+
+        Args:
+            id (int): The unique ID of the movie.
+
+        Returns:
+            Optional[Movie]: The stored movie, or None if there is none.
+        """
+        return self._by_id.get(id)
+
+    def by_genre(self, genre: str, after_id: int = 0, limit: Optional[int] = None) -> List[Movie]:
+        """
+        Return the movies of a genre, ordered by ID.
+
+        The comparison is case-insensitive. Only the requested page is
+        copied out of the genre index.
+
+        Args:
+            genre (str): The genre to look up.
+            after_id (int, optional): Only movies whose ID is greater.
+            limit (int, optional): Return at most this many movies.
+
+        Returns:
+            List[Movie]: The stored movies of that genre.
+        """
+        with self._lock.read():
+            ids = self._by_genre.get(genre.casefold(), [])
+            start = bisect_right(ids, after_id) if after_id else 0
+            stop = None if limit is None else start + limit
+            return [self._by_id[id] for id in ids[start:stop]]
+
+    def iter_by_genre(self, genre: str, after_id: int = 0) -> Iterator[Movie]:
+        """
+        Lazily yield the movies of a genre whose ID is greater than
+        'after_id', ordered by ID.
+
+        Movies are read GENRE_CHUNK at a time, each chunk under the
+        read lock, so a streamed response holds no lock between chunks
+        and never copies the whole genre.
+
+        Args:
+            genre (str): The genre to look up, case-insensitive.
+            after_id (int, optional): The ID to resume after.
+
+        Yields:
+            Movie: The stored movies.
+        """
+        while True:
+            chunk = self.by_genre(genre, after_id, GENRE_CHUNK)
+            yield from chunk
+            if len(chunk) < GENRE_CHUNK:
+                return
+            after_id = chunk[-1].id
+
+    def count_by_genre(self, genre: str, up_to_id: Optional[int] = None) -> int:
+        """
+        Count the movies of a genre, optionally only up to an ID.
+
+        Args:
+            genre (str): The genre, case-insensitive.
+            up_to_id (int, optional): Only count movies whose ID is not
+                greater than this one.
+
+        Returns:
+            int: The number of movies.
+        """
+        with self._lock.read():
+            ids = self._by_genre.get(genre.casefold(), [])
+            return len(ids) if up_to_id is None else bisect_right(ids, up_to_id)
+
+    def random_by_genre(self, genre: str) -> Optional[Movie]:
+        """
+        Return a random movie of a genre.
+
+        Args:
+            genre (str): The genre to pick from, case-insensitive.
+
+        Returns:
+            Optional[Movie]: A stored movie, or None if the genre has
+            no movies.
+        """
+        movies = self.sample(1, genre)
+        return movies[0] if movies else None
+
+    def sample(self, n: int, genre: Optional[str] = None) -> List[Movie]:
+        """
+        Return up to 'n' distinct movies chosen uniformly at random.
+
+        It costs time proportional to 'n', not to the size of the
+        catalog or genre.
+
+        Args:
+            n (int): How many movies to pick.
+            genre (str, optional): The genre to pick from,
+                case-insensitive. Defaults to the whole catalog.
+
+        Returns:
+            List[Movie]: The stored movies, in random order.
+        """
+        with self._lock.read():
+            samples = self._samples if genre is None else self._genre_samples.get(genre.casefold())
+            if samples is None:
+                return []
+            return [self._by_id[id] for id in samples.sample(n)]
+
+    def ids(self, genre: Optional[str] = None) -> List[int]:
+        """
+        Return the IDs of every movie, or of the movies of a genre.
+
+        Args:
+            genre (str, optional): The genre, case-insensitive.
+
+        Returns:
+            List[int]: The IDs, in no particular order.
+        """
+        with self._lock.read():
+            samples = self._samples if genre is None else self._genre_samples.get(genre.casefold())
+            return list(samples) if samples is not None else []
+
+    def search_title(self, kw: str, limit: Optional[int] = None, after_id: int = 0) -> List[Movie]:
+        """
+        Return the movies whose title contains a keyword, ordered by ID.
+
+        The comparison is case-insensitive.
+
+        Args:
+            kw (str): The keyword to look for.
+            limit (int, optional): Stop after this many matches.
+            after_id (int, optional): Only movies whose ID is greater.
+
+        Returns:
+            List[Movie]: The stored matching movies.
+        """
+        with self._lock.read():
+            return [self._by_id[id] for id in self._titles.search(kw, limit, after_id)]
+
+    def iter_title_matches(self, kw: str, after_id: int = 0) -> Iterator[Movie]:
+        """
+        Lazily yield the movies whose title contains a keyword and
+        whose ID is greater than 'after_id', ordered by ID.
+
+        Matches are searched TITLE_CHUNK at a time, each chunk under
+        the read lock, as iter_by_genre does.
+
+        Args:
+            kw (str): The keyword to look for, case-insensitive.
+            after_id (int, optional): The ID to resume after.
+
+        Yields:
+            Movie: The stored matching movies.
+        """
+        while True:
+            chunk = self.search_title(kw, TITLE_CHUNK, after_id)
+            yield from chunk
+            if len(chunk) < TITLE_CHUNK:
+                return
+            after_id = chunk[-1].id
+
+    def count_title_matches(self, kw: str, up_to_id: Optional[int] = None) -> int:
+        """
+        Count the movies whose title contains a keyword.
+
+        Args:
+            kw (str): The keyword to look for, case-insensitive.
+            up_to_id (int, optional): Only count movies whose ID is not
+                greater than this one.
+
+        Returns:
+            int: The number of matches.
+        """
+        with self._lock.read():
+            return self._titles.count(kw, up_to_id)
+
+    def subscribe(self, listener: Callable[[List[Tuple[Optional[Movie], Optional[Movie]]]], None]) -> None:
+        """
+        Register a function to call after every write.
+
+        It receives a list of (old, new) movie pairs: old is None for
+        added movies and new is None for removed ones. It is called
+        with the write lock still held, right after the version is
+        bumped, so listeners see writes one at a time and in order,
+        and no reader sees the new data before they ran. Listeners
+        must be quick and must not call back into the catalog.
+
+        Args:
+            listener (Callable): The function to call.
+        """
+        self._listeners.append(listener)
+
+    def version(self) -> int:
+        """
+        Return the catalog version, which grows by one on every write.
+
+        Returns:
+            int: The current version.
+        """
+        return self._version
+
+    def etag(self) -> str:
+        """
+        Return a strong entity tag for the current catalog contents.
+
+        It changes on every write, and two catalog instances (another
+        worker, or the same one after a restart) never share one.
+
+        Returns:
+            str: The unquoted entity tag.
+        """
+        return f'{self._epoch}-{self._version}'
+
+    def next_id(self) -> int:
+        """
+        Return the ID the next added movie will receive.
+
+        IDs are never reused, even after the movie holding the highest
+        ID is removed. With a storage shared by several processes this
+        is a lower bound: another process may take it first.
+
+        Returns:
+            int: The next available unique movie ID.
+        """
+        return self._next_id
+
+    def add(self, titulo: str, genero: str) -> Movie:
+        """
+        Create a movie with a freshly allocated ID and store it.
+
+        Args:
+            titulo (str): The movie title.
+            genero (str): The movie genre.
+
+        Returns:
+            Movie: The stored movie.
+
+        Raises:
+            TypeError: If the title or genre is not a string.
+        """
+        _check(titulo, genero)
+        with self._lock.write():
+            self._check_storage()
+            movie = self._insert(Movie(self._allocate(1), titulo, genero))
+            self._version += 1
+            ticket = self._storage.insert_many([movie], wait=False) if self._storage is not None else None
+            self._notify([(None, movie)])
+        self._sync(ticket)
+        return movie
+
+    def add_many(self, rows: Iterable[Tuple[str, str]]) -> List[Movie]:
+        """
+        Create several movies at once.
+
+        The IDs are allocated as one contiguous block, the write lock
+        is taken once and the movies are handed to the storage backend
+        as a single write.
+
+        Args:
+            rows (Iterable[Tuple[str, str]]): (titulo, genero) pairs.
+
+        Returns:
+            List[Movie]: The stored movies.
+
+        Raises:
+            TypeError: If any title or genre is not a string; nothing
+                is stored then.
+        """
+        rows = list(rows)
+        for titulo, genero in rows:
+            _check(titulo, genero)
+        with self._lock.write():
+            self._check_storage()
+            movies = [
+                self._insert(Movie(id, titulo, genero))
+                for id, (titulo, genero) in enumerate(rows, start=self._allocate(len(rows)))
+            ]
+            self._version += 1
+            ticket = self._storage.insert_many(movies, wait=False) if self._storage is not None else None
+            self._notify([(None, movie) for movie in movies])
+        self._sync(ticket)
+        return movies
+
+    def update(self, id: int, titulo: str, genero: str) -> Optional[Movie]:
+        """
+        Replace the title and genre of an existing movie.
+
+        The stored record is replaced by a new Movie rather than
+        modified, so readers holding the old one are unaffected.
+
+        Args:
+            id (int): The unique ID of the movie to update.
+            titulo (str): The new title.
+            genero (str): The new genre.
+
+        Returns:
+            Optional[Movie]: The updated movie, or None if there is none.
+
+        Raises:
+            TypeError: If the title or genre is not a string.
+        """
+        _check(titulo, genero)
+        with self._lock.write():
+            self._check_storage()
+            old_movie = self._by_id.get(id)
+            if old_movie is None:
+                return None
+            movie = Movie(id, titulo, genero)
+            self._unindex_genre(old_movie)
+            self._by_id[id] = movie
+            self._index_genre(movie)
+            self._titles.add(id, titulo)
+            self._version += 1
+            ticket = self._storage.update(movie, wait=False) if self._storage is not None else None
+            self._notify([(old_movie, movie)])
+        self._sync(ticket)
+        return movie
+
+    def remove(self, id: int) -> Optional[Movie]:
+        """
+        Remove the movie with the given ID.
+
+        Args:
+            id (int): The unique ID of the movie to remove.
+
+        Returns:
+            Optional[Movie]: The removed movie, or None if there is none.
+        """
+        with self._lock.write():
+            self._check_storage()
+            movie = self._by_id.pop(id, None)
+            if movie is None:
+                return None
+            self._unindex_genre(movie)
+            self._titles.remove(id)
+            self._samples.discard(id)
+            self._tombstones += 1
+            if self._tombstones * 2 > len(self._order):
+                # NOTE - armamos una lista nueva en vez de modificarla,
+                # asi no rompemos a quien la este recorriendo
+                self._order = [id for id in self._order if id in self._by_id]
+                self._tombstones = 0
+            self._version += 1
+            ticket = self._storage.delete(id, wait=False) if self._storage is not None else None
+            self._notify([(movie, None)])
+        self._sync(ticket)
+        return movie
+
+    def _allocate(self, count: int) -> int:
+        # NOTE - con storage los ids los asigna la base, asi dos procesos
+        # que comparten el archivo nunca reparten el mismo; las escrituras
+        # se encolan con el lock tomado para que el orden en disco sea el
+        # mismo que en memoria, pero el commit se espera afuera
+        if self._storage is None or not count:
+            return self._next_id
+        return self._storage.allocate_ids(count, self._next_id)
+
+    def _reset(self) -> None:
+        self._by_id: Dict[int, Movie] = {}
+        self._by_genre: Dict[str, List[int]] = {}
+        self._samples = DenseIndex()
+        self._genre_samples: Dict[str, DenseIndex] = {}
+        self._titles = TitleIndex()
+        self._order: List[int] = []
+        self._tombstones = 0
+
+    def _check_storage(self) -> None:
+        # NOTE - se llama con el lock de escritura tomado, antes de tocar
+        # nada; si el storage perdio escrituras volvemos a lo guardado
+        if self._storage is None or self._storage.failures == self._storage_failures:
+            return
+        try:
+            self._storage.flush()
+        except RuntimeError:
+            pass
+        self._storage_failures = self._storage.failures
+        stored, next_id = self._storage.load()
+        old = self._by_id
+        self._reset()
+        for movie in stored:
+            self._insert(movie)
+        self._next_id = max(self._next_id, next_id)
+        changes = [
+            (old.get(id), self._by_id.get(id))
+            for id in old.keys() | self._by_id.keys()
+            if old.get(id) != self._by_id.get(id)
+        ]
+        if changes:
+            self._version += 1
+            self._notify(changes)
+
+    def _notify(self, changes: List[Tuple[Optional[Movie], Optional[Movie]]]) -> None:
+        for listener in self._listeners:
+            listener(changes)
+
+    def _sync(self, ticket: Optional[int]) -> None:
+        if ticket is None:
+            return
+        try:
+            self._storage.sync(ticket)
+        except RuntimeError:
+            with self._lock.write():
+                self._check_storage()
+            raise
+
+    def _insert(self, movie: Movie) -> Movie:
+        self._by_id[movie.id] = movie
+        if not self._order or self._order[-1] < movie.id:
+            self._order.append(movie.id)
+        elif self._order[bisect_right(self._order, movie.id) - 1] != movie.id:
+            position = bisect_right(self._order, movie.id)
+            self._order = self._order[:position] + [movie.id] + self._order[position:]
+        self._next_id = max(self._next_id, movie.id + 1)
+        self._samples.add(movie.id)
+        self._index_genre(movie)
+        self._titles.add(movie.id, movie.titulo)
+        return movie
+
+    def _index_genre(self, movie: Movie) -> None:
+        key = movie.genero.casefold()
+        self._genre_samples.setdefault(key, DenseIndex()).add(movie.id)
+        ids = self._by_genre.setdefault(key, [])
+        if not ids or ids[-1] < movie.id:
+            ids.append(movie.id)
+        else:
+            # NOTE - un update puede mover una pelicula vieja a otro genero
+            insort(ids, movie.id)
+
+    def _unindex_genre(self, movie: Movie) -> None:
+        key = movie.genero.casefold()
+        ids = self._by_genre[key]
+        del ids[bisect_right(ids, movie.id) - 1]
+        self._genre_samples[key].discard(movie.id)
+        if not ids:
+            del self._by_genre[key]
+            del self._genre_samples[key]
@@ -0,0 +1,193 @@
+"""
+Local stand-in for the nolaborables holiday API.
+
+It answers GET /api/v2/feriados/<year> with the recorded responses in
+fixtures/ (feriados_<year>.json). Years without a recording get the
+holidays of the closest recorded year. Latency, error responses and
+timeouts can be injected, and changed while it runs, so the holiday
+routes can be tested and benchmarked offline under controlled
+upstream conditions.
+
+Example usage:
+    python -m fake_nolaborables --port 8001 --latency 0.05 --error-rate 0.1
+    NOLABORABLES_BASE_URL=http://127.0.0.1:8001 python main.py
+"""
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+YEAR_PATH = re.compile(r'^/api/v2/feriados/(\d{4})/?$')
+
+
+def recorded_years(fixtures_dir=FIXTURES_DIR):
+    years = []
+    for name in os.listdir(fixtures_dir):
+        match = re.fullmatch(r'feriados_(\d{4})\.json', name)
+        if match:
+            years.append(int(match.group(1)))
+    return sorted(years)
+
+
+def load_recorded(year, fixtures_dir=FIXTURES_DIR):
+    """
+    Return the recorded holidays of a year.
+
+    Args:
+        year (int): The year.
+        fixtures_dir (str, optional): Where the recordings are.
+
+    Returns:
+        list: The holidays, as nolaborables returns them. For a year
+        without a recording, those of the closest recorded year.
+    """
+    closest = min(recorded_years(fixtures_dir), key=lambda recorded: (abs(recorded - year), recorded))
+    with open(os.path.join(fixtures_dir, f'feriados_{closest}.json'), encoding='utf-8') as recording:
+        return json.load(recording)
+
+
+class _Server(ThreadingHTTPServer):
+    # NOTE - el backlog por defecto es 5: con mas conexiones simultaneas
+    # los SYN se descartan y el benchmark mide sus retransmisiones
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class FakeNolaborables:
+    """
+    HTTP server that replays recorded nolaborables responses.
+
+    Every request first waits 'latency' seconds (plus up to 'jitter'
+    more). Then, with probability 'timeout_rate', it hangs for 'hang'
+    seconds and closes the connection without answering, to trip the
+    client's read timeout; otherwise, with probability 'error_rate',
+    it answers 'error_status'. The attributes can be changed while
+    the server runs. 'requests' counts the requests received.
+
+    Args:
+        latency (float, optional): Seconds to wait before answering.
+        jitter (float, optional): Extra random wait, up to this long.
+        error_rate (float, optional): Share of requests answered with
+            'error_status'.
+        error_status (int, optional): The status of injected errors.
+        timeout_rate (float, optional): Share of requests never answered.
+        hang (float, optional): How long unanswered requests hang.
+        fixtures_dir (str, optional): Where the recordings are.
+        host (str, optional): The address to listen on.
+        port (int, optional): The port to listen on; 0 picks a free one.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, error_status=503, timeout_rate=0.0,
+                 hang=15.0, fixtures_dir=FIXTURES_DIR, host='127.0.0.1', port=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.timeout_rate = timeout_rate
+        self.hang = hang
+        self.fixtures_dir = fixtures_dir
+        self.requests = 0
+        self._bodies = {}
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def url(self, year):
+        return f'{self.base_url}/api/v2/feriados/{year}'
+
+    def holidays(self, year):
+        return json.loads(self._body(year))
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _body(self, year):
+        with self._lock:
+            body = self._bodies.get(year)
+            if body is None:
+                body = self._bodies[year] = json.dumps(
+                    load_recorded(year, self.fixtures_dir), ensure_ascii=False).encode()
+            return body
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                with fake._lock:
+                    fake.requests += 1
+                time.sleep(fake.latency + random.uniform(0, fake.jitter))
+                if random.random() < fake.timeout_rate:
+                    time.sleep(fake.hang)
+                    self.close_connection = True
+                    return
+                match = YEAR_PATH.match(self.path.split('?')[0])
+                if match is None:
+                    self._send(404, b'{"error": "Not found"}')
+                elif random.random() < fake.error_rate:
+                    self._send(fake.error_status, b'{"error": "Injected error"}')
+                else:
+                    self._send(200, fake._body(int(match.group(1))))
+
+            def _send(self, status, body):
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--timeout-rate', type=float, default=0.0)
+    parser.add_argument('--hang', type=float, default=15.0)
+    options = parser.parse_args()
+
+    fake = FakeNolaborables(options.latency, options.jitter, options.error_rate, options.error_status,
+                            options.timeout_rate, options.hang, host=options.host, port=options.port)
+    print(f'Serving recorded holidays on {fake.base_url} (NOLABORABLES_BASE_URL)')
+    try:
+        fake._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fake._server.server_close()
+
+
+if __name__ == '__main__':
+    main()
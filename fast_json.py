@@ -0,0 +1,127 @@
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from flask.json.provider import DefaultJSONProvider
+
+from movie import Movie
+
+try:
+    import orjson
+except ImportError:
+    # NOTE - orjson es opcional, sin el usamos el json de la stdlib
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that encodes and decodes with orjson when it
+    is installed, and falls back to Flask's stdlib-based provider
+    otherwise.
+
+    orjson output is compact UTF-8 instead of ASCII with \\u escapes,
+    and keys are still sorted when 'sort_keys' is set. Calls that pass
+    json.dumps/json.loads keyword arguments, and pretty-printed debug
+    responses, always go through the stdlib. Movie records are encoded
+    as their to_dict() object by both encoders.
+    """
+
+    @staticmethod
+    def default(o: Any) -> Any:
+        if isinstance(o, Movie):
+            return o.to_dict()
+        return DefaultJSONProvider.default(o)
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode()
+
+    def dumps_bytes(self, obj: Any) -> bytes:
+        """
+        Serialize data as compact JSON bytes.
+
+        Args:
+            obj (Any): The data to serialize.
+
+        Returns:
+            bytes: The UTF-8 encoded JSON.
+        """
+        if orjson is None:
+            return super().dumps(obj, separators=(',', ':')).encode()
+        option = orjson.OPT_SORT_KEYS if self.sort_keys else 0
+        return orjson.dumps(obj, default=self.default, option=option)
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj) + b'\n', mimetype=self.mimetype)
+
+
+# NOTE - valor de id que ningun registro real puede tener
+_ID_SENTINEL = -7315662398513
+
+
+class RecordFragments:
+    """
+    Cache of the encoded JSON of each record, reused across responses.
+
+    Each record is encoded once, with its 'id' value cut out, so the
+    same fragment serves the stored record, the renumbered copies the
+    search endpoints return, and copies with an extra 'rank' field. Records are never mutated in
+    place (updates replace them), so a fragment is reused for as long
+    as its record is the one passed in; forget() drops the fragments
+    of records a write replaced or removed.
+
+    Args:
+        dumps_bytes (Callable[[Any], bytes]): Compact JSON encoder.
+    """
+
+    def __init__(self, dumps_bytes: Callable[[Any], bytes]) -> None:
+        self._dumps = dumps_bytes
+        self._fragments: Dict[int, Tuple[Movie, bytes, bytes, bytes]] = {}
+
+    def encode(self, record: Movie, id: Optional[int] = None, rank: Optional[int] = None) -> bytes:
+        """
+        Return the JSON of a record, optionally with another 'id' or
+        a 'rank' field.
+
+        Args:
+            record (Movie): The stored record.
+            id (int, optional): The 'id' value to write instead.
+            rank (int, optional): The 'rank' value to add.
+
+        Returns:
+            bytes: The encoded record.
+        """
+        entry = self._fragments.get(record.id)
+        if entry is None or entry[0] is not record:
+            marker = b'"id":' + str(_ID_SENTINEL).encode()
+            head, _, tail = self._dumps(dict(record.to_dict(), id=_ID_SENTINEL)).partition(marker)
+            head += b'"id":'
+            entry = (record, head, tail, head + str(record.id).encode() + tail)
+            self._fragments[record.id] = entry
+        if id is None and rank is None:
+            return entry[3]
+        id_value = str(record.id if id is None else id).encode()
+        if rank is None:
+            return entry[1] + id_value + entry[2]
+        # NOTE - 'rank' va justo despues de 'id', asi las claves quedan
+        # ordenadas igual que con sort_keys
+        return entry[1] + id_value + b',"rank":' + str(rank).encode() + entry[2]
+
+    def forget(self, changes: Iterable[Tuple[Optional[Movie], Optional[Movie]]]) -> None:
+        """
+        Drop the fragments of records that were updated or removed.
+
+        Args:
+            changes (Iterable): (old, new) record pairs, as passed to
+                MovieCatalog listeners.
+        """
+        for old_record, _ in changes:
+            if old_record is not None:
+                self._fragments.pop(old_record.id, None)
@@ -0,0 +1,157 @@
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 10
+RETRIES = 2
+BACKOFF = 0.3
+POOL_SIZE = 10
+# NOTE - despues de BREAKER_THRESHOLD fallas seguidas dejamos de llamar
+# a la API por BREAKER_COOLDOWN segundos
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 30
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of calling an upstream that keeps failing."""
+
+
+class CircuitBreaker:
+    """
+    Fails fast after 'threshold' consecutive failures.
+
+    While open, every call is rejected until 'cooldown' seconds have
+    passed; then a single trial call is let through (half-open) and
+    its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN, clock=time.monotonic):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self.opened_at is None:
+                return 'closed'
+            if self.clock() - self.opened_at >= self.cooldown:
+                return 'half-open'
+            return 'open'
+
+    def before_call(self):
+        with self._lock:
+            if self.opened_at is None:
+                return
+            if self.clock() - self.opened_at < self.cooldown or self._trial:
+                raise CircuitOpenError("Upstream unavailable, circuit breaker is open")
+            self._trial = True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.threshold:
+                self.opened_at = self.clock()
+            self._trial = False
+
+
+class LatencyStats:
+    """Counters and timings of the calls made through a HolidayClient."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.last_seconds = None
+        self._lock = threading.Lock()
+
+    def record(self, seconds, ok):
+        with self._lock:
+            self.calls += 1
+            if not ok:
+                self.errors += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+            self.last_seconds = seconds
+
+    def record_rejected(self):
+        with self._lock:
+            self.rejected += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'errors': self.errors,
+                'rejected': self.rejected,
+                'avg_seconds': self.total_seconds / self.calls if self.calls else 0.0,
+                'max_seconds': self.max_seconds,
+                'last_seconds': self.last_seconds,
+            }
+
+
+class HolidayClient:
+    """
+    Shared HTTP client for every outbound holiday call.
+
+    It reuses pooled keep-alive connections through a single
+    requests.Session, bounds every call with connect/read timeouts,
+    retries idempotent GETs on connection errors and 5xx responses
+    with exponential backoff, and stops calling an upstream that keeps
+    failing through a CircuitBreaker. Per-call latency is recorded in
+    'stats'.
+    """
+
+    def __init__(self, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT,
+                 retries=RETRIES, backoff=BACKOFF, pool_size=POOL_SIZE, breaker=None):
+        self.timeout = (connect_timeout, read_timeout)
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self.stats = LatencyStats()
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=('GET',),
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def get_json(self, url):
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError:
+            self.stats.record_rejected()
+            raise
+
+        start = time.perf_counter()
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+            response.raise_for_status()
+            data = response.json()
+        except Exception:
+            self.stats.record(time.perf_counter() - start, ok=False)
+            self.breaker.record_failure()
+            raise
+        self.stats.record(time.perf_counter() - start, ok=True)
+        self.breaker.record_success()
+        return data
+
+
+holiday_client = HolidayClient()
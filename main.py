@@ -1,11 +1,33 @@
-from flask import Flask, jsonify, request, Response
-from typing import Optional, Tuple
-import random
-from proximo_feriado import NextHoliday
+from flask import Flask, g, jsonify, request, Response
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from functools import wraps
+from itertools import islice
+import csv
+import io
+import math
+import os
+import time
+from datetime import date
+import requests
+from proximo_feriado import (CALENDAR_YEARS_AHEAD, CALENDAR_YEARS_BACK, MAX_CALENDAR_YEARS, HolidayCalendar,
+                             HolidayPrefetcher, NextHoliday)
+from catalog import MovieCatalog
+from movie import Movie
+from storage import SQLiteStorage
+from response_cache import ResponseCache
+from fast_json import FastJSONProvider, RecordFragments
+from sampling import PopularitySampler
+from rate_limit import AdmissionControl, RateLimiter, Rule
+from metrics import Registry
+from holiday_client import holiday_client
 
 
 app = Flask(__name__)
-peliculas = [
+app.json = FastJSONProvider(app)
+# NOTE - con PELICULAS_DB el catalogo se guarda en ese archivo SQLite y
+# sobrevive a los reinicios; sin ella vive solo en memoria
+storage = SQLiteStorage(os.environ['PELICULAS_DB']) if os.environ.get('PELICULAS_DB') else None
+peliculas = MovieCatalog([
     {'id': 1, 'titulo': 'Indiana Jones', 'genero': 'Acción'},
     {'id': 2, 'titulo': 'Star Wars', 'genero': 'Acción'},
     {'id': 3, 'titulo': 'Interstellar', 'genero': 'Ciencia ficción'},
@@ -18,30 +40,235 @@ peliculas = [
     {'id': 10, 'titulo': 'The Shawshank Redemption', 'genero': 'Drama'},
     {'id': 11, 'titulo': 'Pulp Fiction', 'genero': 'Crimen'},
     {'id': 12, 'titulo': 'Fight Club', 'genero': 'Drama'}
-]
+], storage=storage)
+# NOTE - JSON ya codificado de cada pelicula, para no volver a
+# serializarla en cada listado
+fragments = RecordFragments(app.json.dumps_bytes)
+peliculas.subscribe(fragments.forget)
+
+
+# NOTE - los CDN y navegadores pueden reutilizar una respuesta por
+# CACHE_MAX_AGE segundos, despues la revalidan con If-None-Match
+CACHE_MAX_AGE = 5
+CACHE_CONTROL = f'public, max-age={CACHE_MAX_AGE}, must-revalidate'
+
+
+def conditional(view: Callable) -> Callable:
+    """
+    Make a read-only view answer conditional GETs.
+
+    Responses are tagged with a strong ETag built from the 'peliculas'
+    catalog version, which changes on every write, so any response the
+    view produces for a given URL is the same while the tag is. A
+    request whose If-None-Match holds the current tag gets a 304
+    without the view running, so nothing is looked up or serialized.
+
+    Args:
+        view (Callable): The view function to wrap.
+
+    Returns:
+        Callable: The wrapped view.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return view(*args, **kwargs)
+        # NOTE - leemos la version antes de armar la respuesta: si hay
+        # una escritura en el medio la etiqueta queda vieja, nunca adelantada
+        etag = peliculas.etag()
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        else:
+            response = app.make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = CACHE_CONTROL
+        return response
+    return wrapper
+
+
+STREAM_FORMATS = ('ndjson', 'json')
+SEARCH_VIEWS = ('position', 'record')
+FLAG_VALUES = {'1': True, 'true': True, '0': False, 'false': False}
+
+
+class InvalidPageArgs(ValueError):
+    """Raised when the pagination query parameters are malformed."""
+
+
+class PageArgs(NamedTuple):
+    limit: Optional[int]
+    after_id: int
+    stream: Optional[str]
+
+
+class SearchView(NamedTuple):
+    renumber: bool
+    rank: bool
+
+
+def read_page_args() -> PageArgs:
+    """
+    Read the pagination query parameters of the current request.
+
+    Query Parameters:
+        limit (int, optional): The maximum number of movies per page.
+        after_id (int, optional): Only return movies whose catalog ID
+            is greater than this one. Defaults to 0.
+        stream (str, optional): 'ndjson' or 'json' to stream the
+            movies instead of building the whole body in memory.
+
+    Returns:
+        PageArgs: The parsed parameters.
+
+    Raises:
+        InvalidPageArgs: If a parameter is not a valid value.
+    """
+    limit = int_arg("limit")
+    if limit is not None and limit < 1:
+        raise InvalidPageArgs("Invalid limit")
+    after_id = int_arg("after_id") or 0
+    stream = request.args.get("stream")
+    if stream is not None and stream not in STREAM_FORMATS:
+        raise InvalidPageArgs("Invalid stream format")
+    return PageArgs(limit, after_id, stream)
+
+
+def read_search_view() -> SearchView:
+    """
+    Read how the current search request wants its matches returned.
+
+    Query Parameters:
+        view (str, optional): 'position' (the default) replaces each
+            match's 'id' with its 1-based position in the results;
+            'record' returns the stored records with their real IDs.
+        rank (str, optional): '1' or 'true' to add each match's 1-based
+            position as a 'rank' field.
+
+    Returns:
+        SearchView: The parsed parameters.
+
+    Raises:
+        InvalidPageArgs: If a parameter is not a valid value.
+    """
+    view = request.args.get("view", "position")
+    if view not in SEARCH_VIEWS:
+        raise InvalidPageArgs("Invalid view")
+    return SearchView(view == 'position', flag_arg("rank"))
+
+
+def flag_arg(name: str) -> bool:
+    value = FLAG_VALUES.get(request.args.get(name, "0").lower())
+    if value is None:
+        raise InvalidPageArgs(f"Invalid {name}")
+    return value
+
+
+def int_arg(name: str) -> Optional[int]:
+    # NOTE - request.args.get(..., type=int) ignora valores invalidos
+    # en silencio, aca los rechazamos
+    value = request.args.get(name)
+    if value is None:
+        return None
+    if not value.isdecimal():
+        raise InvalidPageArgs(f"Invalid {name}")
+    return int(value)
+
+
+def page_response(movies: Iterable[Movie], page: PageArgs, offset: int = 0,
+                  renumber: bool = False, rank: bool = False) -> Response:
+    """
+    Build the response for one page of movies.
+
+    Only 'page.limit' movies are taken from 'movies', which must be
+    ordered by ID. When more movies follow, the catalog ID of the last
+    one returned is sent in the 'X-Next-Cursor' header, to be passed
+    back as 'after_id'. Movies are encoded from their cached JSON
+    fragments. With 'page.stream' set, they are encoded one at a time
+    as the body is sent, so memory stays flat.
+
+    Args:
+        movies (Iterable[Movie]): The stored movies, starting at the page.
+        page (PageArgs): The pagination parameters of the request.
+        offset (int, optional): How many movies precede the page.
+        renumber (bool, optional): Replace each movie's 'id' with its
+            1-based position, as the search endpoints do by default.
+        rank (bool, optional): Add each movie's 1-based position as a
+            'rank' field.
+
+    Returns:
+        Response: A JSON array, NDJSON or streamed JSON array response.
+    """
+    movies = iter(movies)
+    next_cursor = None
+    if page.limit is not None:
+        movies_page = list(islice(movies, page.limit + 1))
+        if len(movies_page) > page.limit:
+            movies_page.pop()
+            next_cursor = movies_page[-1].id
+        movies = iter(movies_page)
+    if renumber or rank:
+        encoded = (
+            fragments.encode(movie, position if renumber else None, position if rank else None)
+            for position, movie in enumerate(movies, start=offset + 1)
+        )
+    else:
+        encoded = (fragments.encode(movie) for movie in movies)
+
+    if page.stream == 'ndjson':
+        response = Response((movie + b'\n' for movie in encoded), mimetype='application/x-ndjson')
+    elif page.stream == 'json':
+        response = Response(stream_json_array(encoded), mimetype='application/json')
+    else:
+        response = app.response_class(b'[' + b','.join(encoded) + b']\n', mimetype=app.json.mimetype)
+    if next_cursor is not None:
+        response.headers['X-Next-Cursor'] = str(next_cursor)
+    return response
+
+
+def stream_json_array(encoded: Iterator[bytes]) -> Iterator[bytes]:
+    """
+    Yield a JSON array chunk by chunk, one encoded movie per chunk.
+    """
+    yield b'['
+    for position, movie in enumerate(encoded):
+        yield (b',' if position else b'') + movie
+    yield b']\n'
+
+
+def invalid_page_args(error: InvalidPageArgs) -> Response:
+    return jsonify({'error': str(error)}), 400
+
+
+def holiday_service_unavailable(error: requests.RequestException) -> Response:
+    # NOTE - nolaborables caido, lento o con el circuito abierto: misma
+    # respuesta que da el modo asincronico (asgi.py)
+    return jsonify({"error": "Holiday service unavailable"}), 503
 
 
 def get_all_movies() -> Response:
     """
     Return all movies as a JSON response.
 
-    This function retrieves the entire list of movies from the
-    'peliculas' list and returns it as a JSON array. No input
-    parameters are required.
+    This function retrieves the movies from the 'peliculas' catalog
+    and returns them as a JSON array, one page at a time when 'limit'
+    is given (see read_page_args and page_response).
 
     Returns:
         Response: A JSON response containing all movies.
     """
-    return jsonify(peliculas)
+    page = read_page_args()
+    with span('json_encode'):
+        return page_response(peliculas.iter_from(page.after_id), page)
 
 
 def get_movie(id: int) -> Response:
     """
     Retrieve a movie by its integer ID.
 
-    Searches the 'peliculas' list for a movie whose 'id' matches
-    the given parameter. If no match is found, returns an error
-    message with status code 404.
+    Looks the ID up in the 'peliculas' catalog's ID index. If no
+    match is found, returns an error message with status code 404.
 
     Args:
         id (int): The unique ID of the movie.
@@ -50,9 +277,10 @@ def get_movie(id: int) -> Response:
         Response: A JSON response with the matching movie or
         an error message if not found.
     """
-    for movie in peliculas:
-        if movie['id'] == id:
-            return jsonify(movie)
+    movie = peliculas.get(id)
+    if movie is not None:
+        popularity.record(id)
+        return jsonify(movie)
     return jsonify({"error": "Movie could not be found or does not exist"}), 404
 
 
@@ -62,19 +290,18 @@ def add_movie() -> Response:
 
     Expects a JSON body with 'titulo' (str) and 'genero' (str).
     Automatically generates a unique integer ID for the movie
-    and appends the movie to the 'peliculas' list.
+    and adds the movie to the 'peliculas' catalog.
 
     Returns:
         tuple[Response, int]: A JSON response with the new movie
-        and HTTP status code 201.
-    """
-    new_movie = {
-        'id': get_new_id(),
-        'titulo': request.json['titulo'],
-        'genero': request.json['genero']
-    }
-    peliculas.append(new_movie)
-    print(peliculas)
+        and HTTP status code 201, or an error message with status
+        code 400 if either field is missing or not a string.
+    """
+    try:
+        titulo, genero = validate_row(request.json)
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+    new_movie = peliculas.add(titulo, genero)
     return jsonify(new_movie), 201
 
 
@@ -83,24 +310,24 @@ def update_movie(id: int) -> Response:
     Update the title and genre of an existing movie by ID.
 
     Expects a JSON body with 'titulo' (str) and 'genero' (str).
-    If the given ID is invalid (out of range), returns a 404
-    error message. Otherwise, updates the movie in place.
+    If no movie has the given ID, returns a 404 error message.
+    Otherwise, updates the movie in place.
 
     Args:
         id (int): The unique ID of the movie to update.
 
     Returns:
-        Response: A JSON response with the updated movie or an
-        error message if not found.
+        Response: A JSON response with the updated movie, or an
+        error message with status code 400 for an invalid body or
+        404 if not found.
     """
-    if id <= 0 or id > len(peliculas):
+    try:
+        titulo, genero = validate_row(request.json)
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+    updated_movie = peliculas.update(id, titulo, genero)
+    if updated_movie is None:
         return jsonify({"error": "Movie could not be found"}), 404
-    updated_movie = {
-        'id': id,
-        'titulo': request.json['titulo'],
-        'genero': request.json['genero']
-    }
-    peliculas[id - 1].update(updated_movie)
     return jsonify(updated_movie)
 
 
@@ -108,10 +335,10 @@ def remove_movie(id: int) -> Response:
     """
     Remove a movie by its integer ID.
 
-    Searches for the movie with the given ID in the 'peliculas'
-    list. If not found, returns a 404 error. If found, removes
-    it and returns a success message. (Note: This function no
-    longer reassigns IDs sequentially in this version.)
+    Removes the movie with the given ID from the 'peliculas'
+    catalog. If not found, returns a 404 error. If found, returns
+    a success message. (Note: This function no longer reassigns
+    IDs sequentially in this version.)
 
     Args:
         id (int): The unique ID of the movie to remove.
@@ -120,12 +347,10 @@ def remove_movie(id: int) -> Response:
         Response: A JSON response with a success message or a
         404 error message if not found.
     """
-    movie_aux = next((movie for movie in peliculas if movie['id'] == id), None)
-    
+    movie_aux = peliculas.remove(id)
+
     if movie_aux is None:
         return jsonify({'mensaje' : 'Movie not in list'}), 404
-    
-    peliculas.remove(peliculas[id - 1])
 
     return jsonify({'mensaje' : 'Movie successfully removed'})
 
@@ -134,25 +359,213 @@ def get_new_id():
     """
     Generate a new unique integer ID for a movie.
 
-    Checks the last movie in the 'peliculas' list for its ID
-    and returns one higher. If the list is empty, returns 1.
+    Returns one higher than the highest ID the 'peliculas'
+    catalog has ever held. If it never held a movie, returns 1.
 
     Returns:
         int: The next available unique movie ID.
     """
-    if len(peliculas) > 0:
-        last_id = peliculas[-1]['id']
-        return last_id + 1
+    return peliculas.next_id()
+
+
+MAX_BATCH_IDS = 1000
+# NOTE - el mayor id que SQLite (y orjson) pueden representar
+MAX_MOVIE_ID = 2 ** 63 - 1
+
+
+def get_movies_batch() -> Response:
+    """
+    Retrieve many movies by ID in a single request.
+
+    Each ID is looked up like get_movie() does, in the 'peliculas'
+    catalog's ID index. IDs are taken from a JSON body
+    {"ids": [1, 2, 3]} on POST, or from the comma-separated 'ids'
+    query parameter on GET. Repeated IDs are only looked up once.
+
+    Query Parameters:
+        ids (str): Comma-separated movie IDs, e.g. '1,2,3'.
+
+    Returns:
+        Response: A JSON object with the found movies in request order
+        under 'found' and the IDs that do not exist under 'missing', or
+        an error message with status code 400 if the IDs are not
+        integers between 1 and MAX_MOVIE_ID or more than MAX_BATCH_IDS
+        are requested.
+    """
+    if request.method == 'POST':
+        body = request.get_json(silent=True)
+        ids = body.get('ids') if isinstance(body, dict) else None
     else:
-        return 1
+        raw_ids = request.args.get('ids', '')
+        ids = [int(id) if id.strip().isdecimal() else id for id in raw_ids.split(',')] if raw_ids else None
+
+    if not isinstance(ids, list) or not all(type(id) is int and 0 < id <= MAX_MOVIE_ID for id in ids):
+        return jsonify({'error': f'ids must be a list of integers between 1 and {MAX_MOVIE_ID}'}), 400
+    if len(ids) > MAX_BATCH_IDS:
+        return jsonify({'error': f'At most {MAX_BATCH_IDS} ids per request'}), 400
+
+    found = []
+    missing = []
+    for id in dict.fromkeys(ids):
+        movie = peliculas.get(id)
+        if movie is not None:
+            found.append(movie)
+        else:
+            missing.append(id)
+    return jsonify({'found': found, 'missing': missing})
+
+
+BULK_CHUNK_SIZE = 10000
+MAX_REPORTED_ERRORS = 100
+CSV_FIELDS = ('id', 'titulo', 'genero')
+NDJSON_MIMETYPES = ('application/x-ndjson', 'application/jsonl', 'application/json-seq')
+
+
+def import_movies() -> Response:
+    """
+    Add many movies from one streamed request body.
+
+    The body is either NDJSON (one JSON object per line) or CSV with
+    a header row, chosen by its Content-Type. Each row needs 'titulo'
+    and 'genero'; any 'id' is ignored and a new one is allocated.
+    Rows are validated and added in chunks of BULK_CHUNK_SIZE, so each
+    chunk takes one block of IDs, one catalog write and one storage
+    commit. Invalid rows are skipped and reported.
+
+    Returns:
+        tuple[Response, int]: A JSON summary with the number of
+        imported and rejected rows and HTTP status code 201, the same
+        summary of the rows read so far plus an error message with
+        status code 400 if the body is not valid UTF-8, or an error
+        message with status code 415 for other content types.
+    """
+    if request.mimetype == 'text/csv':
+        rows = read_csv_rows()
+    elif request.mimetype in NDJSON_MIMETYPES or not request.mimetype:
+        rows = read_ndjson_rows()
+    else:
+        return jsonify({'error': 'Unsupported content type, use NDJSON or CSV'}), 415
+
+    imported = 0
+    rejected = 0
+    errors = []
+    chunk = []
+    decoded = True
+    try:
+        for line, row in rows:
+            try:
+                chunk.append(validate_row(row))
+            except ValueError as error:
+                rejected += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({'line': line, 'error': str(error)})
+            if len(chunk) >= BULK_CHUNK_SIZE:
+                imported += len(peliculas.add_many(chunk))
+                chunk = []
+    except UnicodeDecodeError:
+        # NOTE - los chunks anteriores ya se guardaron: guardamos tambien
+        # las filas validas leidas hasta aca y avisamos cuantas fueron
+        decoded = False
+    if chunk:
+        imported += len(peliculas.add_many(chunk))
+    summary = {'imported': imported, 'rejected': rejected, 'errors': errors}
+    if not decoded:
+        return jsonify(dict(summary, error='Body is not valid UTF-8')), 400
+    return jsonify(summary), 201
+
+
+def read_ndjson_rows() -> Iterator[Tuple[int, object]]:
+    body = io.TextIOWrapper(request.stream, encoding='utf-8-sig')
+    for line, text in enumerate(body, start=1):
+        if not text.strip():
+            continue
+        try:
+            yield line, app.json.loads(text)
+        except ValueError:
+            yield line, None
+
+
+def read_csv_rows() -> Iterator[Tuple[int, object]]:
+    reader = csv.DictReader(io.TextIOWrapper(request.stream, encoding='utf-8-sig', newline=''))
+    for row in reader:
+        yield reader.line_num, row
+
+
+def validate_row(row: object) -> Tuple[str, str]:
+    """
+    Check one imported row and return its (titulo, genero).
+
+    Raises:
+        ValueError: If the row is not an object with non-empty string
+            'titulo' and 'genero' fields.
+    """
+    if not isinstance(row, dict):
+        raise ValueError('Row is not a JSON object')
+    fields = []
+    for field in ('titulo', 'genero'):
+        value = row.get(field)
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError(f"Missing '{field}'")
+        fields.append(value)
+    return fields[0], fields[1]
+
+
+def export_movies() -> Response:
+    """
+    Stream the whole catalog as NDJSON or CSV.
+
+    Movies are read lazily from the 'peliculas' catalog and written in
+    blocks, so memory does not grow with the size of the catalog.
+
+    Query Parameters:
+        format (str, optional): 'ndjson' (default) or 'csv'.
+
+    Returns:
+        Response: A streamed NDJSON or CSV response, or an error
+        message with status code 400 for other formats.
+    """
+    export_format = request.args.get('format', 'ndjson')
+    if export_format == 'ndjson':
+        lines = (fragments.encode(movie) + b'\n' for movie in peliculas.iter_from())
+        return Response(in_blocks(lines), mimetype='application/x-ndjson')
+    if export_format == 'csv':
+        return Response(in_blocks(csv_lines(peliculas.iter_from())), mimetype='text/csv')
+    return jsonify({'error': 'Invalid format, use ndjson or csv'}), 400
+
+
+def csv_lines(movies: Iterator[Movie]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_FIELDS)
+    for movie in movies:
+        writer.writerow([getattr(movie, field) for field in CSV_FIELDS])
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def in_blocks(lines: Iterator[bytes], size: int = 1000) -> Iterator[bytes]:
+    # NOTE - juntamos varias lineas por chunk, escribir una por una en
+    # el socket es mucho mas lento
+    while True:
+        block = b''.join(islice(lines, size))
+        if not block:
+            return
+        yield block
 
 
 def get_movie_by_genre(genre: Optional[str] = None) -> Response:
     """
     Return a list of movies matching a given genre.
 
-    It filters the 'peliculas' list by comparing the genre. If no genre is
-    provided or no matches are found, an error response with status 404 is returned.
+    It reads the matches from the 'peliculas' catalog's genre index, which is
+    keyed by casefolded genre. If no genre is provided or no matches are
+    found, an error response with status 404 is returned. Results can be
+    paginated and streamed (see read_page_args); 'after_id' refers to the
+    catalog ID sent in the 'X-Next-Cursor' header. Matches carry their
+    position as 'id' unless 'view=record' asks for the real catalog IDs
+    (see read_search_view).
 
     Query Parameters:
         genre (str): The genre to filter by when not passed as a function
@@ -178,17 +591,25 @@ def get_movie_by_genre(genre: Optional[str] = None) -> Response:
     if not genre:
         return jsonify({'error' : 'Missing genre'}), 404
     
-    genre_list = []
-    new_id = 1
-    for movie in peliculas:
-        if movie['genero'].lower() == genre.lower():
-            copy_aux = movie.copy()
-            copy_aux['id'] = new_id
-            genre_list.append(copy_aux)
-            new_id += 1
-    if not genre_list:
-        return jsonify({"error" : "No movies found for that genre"}), 404
-    return jsonify(genre_list)
+    page = read_page_args()
+    view = read_search_view()
+
+    def build() -> Response:
+        if not peliculas.count_by_genre(genre):
+            return jsonify({"error" : "No movies found for that genre"}), 404
+        with span('catalog_lookup'):
+            # NOTE - solo se copia la pagina pedida (o se recorre de a
+            # bloques al streamear), nunca el genero entero
+            offset = peliculas.count_by_genre(genre, page.after_id) if page.after_id else 0
+            if page.limit is None:
+                movies = peliculas.iter_by_genre(genre, page.after_id)
+            else:
+                movies = peliculas.by_genre(genre, page.after_id, page.limit + 1)
+        with span('json_encode'):
+            return page_response(movies, page, offset, *view)
+
+    key = genre.casefold()
+    return cached_search(('genre', key, page.limit, page.after_id, view), ('genre', key), page, build)
 
 
 def get_movie_by_title_keyword() -> Response:
@@ -196,8 +617,13 @@ def get_movie_by_title_keyword() -> Response:
     Return movies whose titles contain a given keyword.
 
     Reads the 'kw' (keyword) query parameter from the request.
-    Searches each movie title (case-insensitive) for the keyword.
-    If none is provided or no matches are found, returns an error.
+    Looks the keyword up (case-insensitive) in the 'peliculas'
+    catalog's title index. If none is provided or no matches are
+    found, returns an error. Results can be paginated and streamed
+    (see read_page_args); 'after_id' refers to the catalog ID sent
+    in the 'X-Next-Cursor' header. Matches carry their position as
+    'id' unless 'view=record' asks for the real catalog IDs (see
+    read_search_view).
 
     Query Parameters:
         kw (str): The keyword to look for in movie titles.
@@ -209,37 +635,172 @@ def get_movie_by_title_keyword() -> Response:
     kw = request.args.get("kw")
     if not kw:
         return jsonify({'error' : 'Missing keyword'}), 404
-    
-    match_list = []
-    new_id = 1
-    for movie in peliculas:
-        if kw.lower() in movie['titulo'].lower():
-            copy_aux = movie.copy()
-            copy_aux['id'] = new_id
-            match_list.append(copy_aux)
-            new_id += 1
 
-    if not match_list:
-        return jsonify({'error' : f'There is no movie with keyword: "{kw}"'}), 404
+    page = read_page_args()
+    view = read_search_view()
+
+    def build() -> Response:
+        with span('catalog_lookup'):
+            offset = peliculas.count_title_matches(kw, page.after_id) if page.after_id else 0
+            if page.limit is None:
+                # NOTE - sin limite se recorre de a bloques, como los generos
+                movies = peliculas.iter_title_matches(kw, page.after_id)
+                found = offset or peliculas.search_title(kw, 1, page.after_id)
+            else:
+                # NOTE - la busqueda corta apenas sabe si hay una pagina siguiente
+                movies = found = peliculas.search_title(kw, page.limit + 1, page.after_id)
+
+        if not found:
+            return jsonify({'error' : f'There is no movie with keyword: "{kw}"'}), 404
+
+        with span('json_encode'):
+            return page_response(movies, page, offset, *view)
+
+    key = kw.lower()
+    return cached_search(('kw', key, page.limit, page.after_id, view), ('kw', key), page, build)
+
+
+SEARCH_CACHE_SIZE = 1024
+# NOTE - con escrituras mas grandes que esto (ej. un import masivo)
+# es mas barato vaciar el cache que buscar que entradas tocan
+MAX_PRECISE_INVALIDATION = 100
+search_cache = ResponseCache(SEARCH_CACHE_SIZE, version=peliculas.version)
+
+
+def cached_search(key: tuple, tag: tuple, page: PageArgs, build: Callable[[], Response]) -> Response:
+    """
+    Serve a search response from search_cache, building it on a miss.
+
+    Only successful, non-streamed responses are cached, as encoded
+    bytes, under a key normalized the same way the search compares
+    (casefolded genre, lowercased keyword). The tag names the genre or
+    keyword so invalidate_search_cache can evict it precisely.
+
+    Args:
+        key (tuple): The normalized query, including pagination.
+        tag (tuple): ('genre', genre) or ('kw', keyword).
+        page (PageArgs): The pagination parameters of the request.
+        build (Callable[[], Response]): Builds the response on a miss.
+
+    Returns:
+        Response: The cached or freshly built response.
+    """
+    if page.stream is not None:
+        return build()
+    cached = search_cache.get(key)
+    if cached is not None:
+        return cached.to_response()
+    version = peliculas.version()
+    response = app.make_response(build())
+    if response.status_code == 200:
+        search_cache.put(key, (tag,), response, version)
+    return response
+
+
+def invalidate_search_cache(changes: list) -> None:
+    """
+    Evict the cached searches a catalog write may have changed.
+
+    Genre entries are evicted by the old and new genre of each changed
+    movie, and keyword entries only if the keyword is contained in its
+    old or new title.
+    """
+    if len(changes) > MAX_PRECISE_INVALIDATION:
+        search_cache.clear()
+        search_cache.synced(peliculas.version())
+        return
+    genres = set()
+    titles = []
+    for old_movie, new_movie in changes:
+        for movie in (old_movie, new_movie):
+            if movie is not None:
+                genres.add(('genre', movie.genero.casefold()))
+                titles.append(movie.titulo.lower())
+    search_cache.invalidate(genres)
+    search_cache.invalidate_where(
+        lambda tag: tag[0] == 'kw' and any(tag[1] in title for title in titles))
+    # NOTE - corre con el lock de escritura del catalogo tomado, asi que
+    # esta es la version de esta misma escritura
+    search_cache.synced(peliculas.version())
+
+
+peliculas.subscribe(invalidate_search_cache)
+
+
+def get_search_cache_stats() -> Response:
+    """
+    Return the hit, miss, eviction and invalidation counters of the
+    search response cache.
+
+    Returns:
+        Response: A JSON object with the counters.
+    """
+    return jsonify(search_cache.stats())
+
 
-    return jsonify(match_list)
+MAX_SAMPLE = 1000
+popularity = PopularitySampler(peliculas.ids)
+peliculas.subscribe(popularity.forget)
+
+
+def sample_movies(genre: Optional[str] = None):
+    """
+    Pick random movies for the random endpoints.
+
+    Uniform picks come from the catalog's dense ID arrays and weighted
+    ones from the popularity sampler's alias tables, so neither builds
+    the list of candidates per request.
+
+    Query Parameters:
+        n (int, optional): Return a list of up to this many distinct
+            movies instead of a single movie, at most MAX_SAMPLE.
+        weighted (str, optional): '1' or 'true' to favor the movies
+            most often retrieved by ID (see PopularitySampler).
+
+    Args:
+        genre (str, optional): The genre to pick from. Defaults to the
+            whole catalog.
+
+    Returns:
+        Movie | List[Movie] | None: One movie, or a list when 'n' is
+        given, or None if there is nothing to pick from.
+
+    Raises:
+        InvalidPageArgs: If a parameter is not a valid value.
+    """
+    n = int_arg("n")
+    if n is not None and not 1 <= n <= MAX_SAMPLE:
+        raise InvalidPageArgs("Invalid n")
+    count = 1 if n is None else n
+    if flag_arg("weighted"):
+        key = None if genre is None else genre.casefold()
+        movies = [peliculas.get(id) for id in popularity.sample(count, key)]
+        # NOTE - la tabla puede estar un poco vieja: descartamos las
+        # peliculas borradas o que cambiaron de genero
+        movies = [movie for movie in movies
+                  if movie is not None and (key is None or movie.genero.casefold() == key)]
+    else:
+        movies = peliculas.sample(count, genre)
+    if not movies:
+        return None
+    return movies if n is not None else movies[0]
 
 
 def random_movie():
     """
-    Return a random movie from the 'peliculas' list.
+    Return a random movie from the 'peliculas' catalog.
 
     If the list is empty, returns an error message with a 404
-    status code.
+    status code. See sample_movies for the 'n' and 'weighted'
+    query parameters.
 
     Returns:
         Response: A JSON response with one randomly selected
         movie or an error if no movies exist.
     """
-    if not peliculas:
+    movie = sample_movies()
+    if movie is None:
         return jsonify({"error": "No movies found"}), 404
-    
-    movie = random.choice(peliculas)
     return jsonify(movie)
 
 
@@ -247,9 +808,10 @@ def random_movie_by_genre(genre: Optional[str] = None) -> Response:
     """
     Return a random movie from a specific genre.
 
-    It obtains a list of movies for the specified genre by calling get_movie_by_genre() 
-    and then returns a random selection.
+    It picks a random movie straight from the 'peliculas' catalog's genre
+    index, in constant time, without building the list of matches first.
     If no genre is provided or no matching movies exist, an error is returned.
+    See sample_movies for the 'n' and 'weighted' query parameters.
 
     Query Parameters:
         genre (str): The genre to filter by when not passed as a function
@@ -272,9 +834,10 @@ def random_movie_by_genre(genre: Optional[str] = None) -> Response:
     if genre is None:
         genre = request.args.get("genre")
     if not genre:
-        return jsonify({'error': 'Missing genre'}, 404)
-    list_aux = get_movie_by_genre(genre).get_json()
-    movie = random.choice(list_aux)
+        return jsonify({'error': 'Missing genre'}), 404
+    movie = sample_movies(genre)
+    if movie is None:
+        return jsonify({"error" : "No movies found for that genre"}), 404
     return jsonify(movie)
 
 
@@ -283,9 +846,9 @@ def film_for_holiday() -> Response:
     Suggest a movie based on the next holiday and a specified genre.
 
     Reads the 'genre' query parameter from the request. Uses
-    NextHoliday() to fetch the upcoming holiday, then calls
-    random_movie_by_genre() to select a random movie from the
-    specified genre. Returns both as a JSON object.
+    NextHoliday() to fetch the upcoming holiday, then picks a random
+    movie of the specified genre from the catalog's genre index.
+    Returns both as a JSON object.
 
     Returns:
         Response: A JSON object containing the holiday info and a
@@ -296,11 +859,16 @@ def film_for_holiday() -> Response:
         return jsonify({"error": "Missing parameters genre"}, 404)
 
     next_holiday = NextHoliday()
-    next_holiday.fetch_holidays()
+    with span('holiday_fetch'):
+        next_holiday.fetch_holidays()
 
-    movie = random_movie_by_genre(genre).get_json()
+    with span('catalog_lookup'):
+        movie = peliculas.random_by_genre(genre)
+    if movie is None:
+        return jsonify({"error" : "No movies found for that genre"}), 404
 
-    return jsonify({"feriado": next_holiday.holiday, "pelicula": movie})
+    with span('json_encode'):
+        return jsonify({"feriado": next_holiday.holiday, "pelicula": movie})
     
 
 def film_for_holiday_type() -> Response:
@@ -309,9 +877,9 @@ def film_for_holiday_type() -> Response:
     and a specified genre.
 
     Reads the 'genre' and 'h_type' query parameters from the request. Uses
-    NextHoliday() to fetch the upcoming holiday based on h_type, then calls
-    random_movie_by_genre() to select a random movie from the
-    specified genre. Returns both as a JSON object.
+    NextHoliday() to fetch the upcoming holiday based on h_type, then picks
+    a random movie of the specified genre from the catalog's genre index.
+    Returns both as a JSON object.
 
     Returns:
         Response: A JSON object containing the holiday info and a
@@ -328,17 +896,390 @@ def film_for_holiday_type() -> Response:
         return jsonify({"error": "Missing parameters h_type"}, 404)
 
     next_holiday = NextHoliday()
-    next_holiday.fetch_holidays(h_type)
+    with span('holiday_fetch'):
+        next_holiday.fetch_holidays(h_type)
+
+    with span('catalog_lookup'):
+        movie = peliculas.random_by_genre(genre)
+    if movie is None:
+        return jsonify({"error" : "No movies found for that genre"}), 404
+
+    with span('json_encode'):
+        return jsonify({"feriado": next_holiday.holiday, "pelicula": movie})
+
+
+MAX_BATCH_GENRES = 50
+MAX_BATCH_HOLIDAY_TYPES = 10
+
+
+def split_list(values: Iterable[str]) -> List[str]:
+    # NOTE - acepta tanto 'a,b' como el parametro repetido, sin repetidos
+    items = (item.strip() for value in values for item in value.split(','))
+    return list(dict.fromkeys(item for item in items if item))
+
+
+def holiday_batch_error(genres: List[str], h_types: List[str]) -> Optional[Tuple[dict, int]]:
+    """
+    Validate the genres and holiday types of a batch recommendation.
+
+    Returns:
+        tuple[dict, int] | None: The error body and its status code,
+        or None if the batch is valid.
+    """
+    if not genres:
+        return {"error": "Missing parameters genres"}, 400
+    if not h_types:
+        return {"error": "Missing parameters h_types"}, 400
+    if len(genres) > MAX_BATCH_GENRES:
+        return {"error": f"At most {MAX_BATCH_GENRES} genres per request"}, 400
+    if len(h_types) > MAX_BATCH_HOLIDAY_TYPES:
+        return {"error": f"At most {MAX_BATCH_HOLIDAY_TYPES} holiday types per request"}, 400
+    return None
+
+
+def next_holidays(h_types: List[str], cache=None) -> dict:
+    """
+    Find the next holiday of each type from a single read of the cache.
+
+    Args:
+        h_types (List[str]): The holiday types.
+        cache (optional): Where NextHoliday reads years from. Defaults
+            to the process-wide holiday cache.
+
+    Returns:
+        dict: The next holiday (or NextHoliday's message when there is
+        none) by holiday type.
+    """
+    first = NextHoliday(cache)
+    timeline = first.cache.get(first.year)
+    holidays = {}
+    for h_type in h_types:
+        next_holiday = NextHoliday(first.cache)
+        next_holiday.set_next(timeline, h_type)
+        holidays[h_type] = next_holiday.holiday
+    return holidays
+
+
+def recommend_by_genre(genres: List[str], h_types: List[str]) -> dict:
+    """
+    Pick one movie per (genre, holiday type) pair.
+
+    Each genre is sampled once from the catalog's genre index, for as
+    many distinct movies as there are holiday types; genres with fewer
+    movies repeat them.
 
-    movie = random_movie_by_genre(genre).get_json()
+    Returns:
+        dict: For each genre, the movie (or None when the genre has no
+        movies) by holiday type.
+    """
+    recommendations = {}
+    for genre in genres:
+        movies = peliculas.sample(len(h_types), genre)
+        recommendations[genre] = {
+            h_type: movies[position % len(movies)] if movies else None
+            for position, h_type in enumerate(h_types)
+        }
+    return recommendations
+
+
+def film_for_holiday_batch() -> Response:
+    """
+    Suggest movies for several genres and holiday types at once.
 
-    return jsonify({"feriado": next_holiday.holiday, "pelicula": movie})
+    Reads the 'genres' and 'h_types' query parameters, as
+    comma-separated lists or repeated parameters. The holiday data is
+    read once for the whole batch and each genre is sampled once, so
+    answering every combination costs about as much as one call to
+    film_for_holiday_type() per genre.
+
+    Query Parameters:
+        genres (str): The genres, e.g. 'Drama,Acción'.
+        h_types (str): The holiday types, e.g. 'inamovible,trasladable'.
+
+    Returns:
+        Response: A JSON object with the next holiday of each type
+        under 'feriados' and, under 'peliculas', one movie (or null)
+        per genre and holiday type. If either list is missing or too
+        long, an error with status code 400.
+    """
+    genres = split_list(request.args.getlist("genres"))
+    h_types = split_list(request.args.getlist("h_types"))
+    error = holiday_batch_error(genres, h_types)
+    if error is not None:
+        return jsonify(error[0]), error[1]
+
+    with span('holiday_fetch'):
+        holidays = next_holidays(h_types)
+
+    with span('catalog_lookup'):
+        recommendations = recommend_by_genre(genres, h_types)
+
+    with span('json_encode'):
+        return jsonify({"feriados": holidays, "peliculas": recommendations})
+
+
+DEFAULT_CALENDAR_N = 5
+MAX_CALENDAR_N = 100
+
+
+class CalendarQuery(NamedTuple):
+    # NOTE - con first/last es un rango, sino los proximos n
+    n: int
+    first: Optional[date]
+    last: Optional[date]
+    h_type: Optional[str]
+
+    def years(self, today: date) -> range:
+        if self.first is None:
+            return range(today.year, today.year + CALENDAR_YEARS_AHEAD + 1)
+        return range(self.first.year, self.last.year + 1)
+
+
+def read_calendar_query(args) -> CalendarQuery:
+    """
+    Read the query parameters of the holiday calendar.
+
+    Args:
+        args (Mapping[str, str]): The query parameters.
+
+    Returns:
+        CalendarQuery: The parsed query.
+
+    Raises:
+        InvalidPageArgs: If a parameter is not a valid value.
+    """
+    dates = {}
+    for name in ('from', 'to'):
+        value = args.get(name)
+        if value is not None:
+            try:
+                dates[name] = date.fromisoformat(value)
+            except ValueError:
+                raise InvalidPageArgs(f"Invalid {name}") from None
+    if len(dates) == 1:
+        raise InvalidPageArgs("A range needs both from and to")
+    if dates and dates['to'] < dates['from']:
+        raise InvalidPageArgs("The range ends before it starts")
+    if dates and dates['to'].year - dates['from'].year >= MAX_CALENDAR_YEARS:
+        raise InvalidPageArgs(f"At most {MAX_CALENDAR_YEARS} years per range")
+    if dates:
+        this_year = date.today().year
+        first_year, last_year = this_year - CALENDAR_YEARS_BACK, this_year + CALENDAR_YEARS_AHEAD
+        if dates['from'].year < first_year or dates['to'].year > last_year:
+            raise InvalidPageArgs(f"Ranges must be between {first_year} and {last_year}")
+
+    n = args.get('n', str(DEFAULT_CALENDAR_N))
+    if not n.isdecimal() or not 0 < int(n) <= MAX_CALENDAR_N:
+        raise InvalidPageArgs("Invalid n")
+    return CalendarQuery(int(n), dates.get('from'), dates.get('to'), args.get('h_type') or None)
+
+
+def query_calendar(query: CalendarQuery, cache=None) -> List[dict]:
+    calendar = HolidayCalendar(cache)
+    if query.first is None:
+        return calendar.upcoming(query.n, query.h_type)
+    return calendar.between(query.first, query.last, query.h_type)
+
+
+def get_holiday_calendar() -> Response:
+    """
+    List upcoming holidays, or the holidays between two dates.
+
+    Without 'from' and 'to' it returns the next 'n' holidays after
+    today, from this year and the next; with them, every holiday in
+    that range, which must lie between CALENDAR_YEARS_BACK years ago
+    and next year. Each holiday comes with its ISO date ('fecha'),
+    weekday ('dia_semana') and month name ('nombre_mes'), read from
+    the calendar entries precomputed when the year was downloaded.
+
+    Query Parameters:
+        n (int, optional): How many upcoming holidays, 5 by default
+            and at most MAX_CALENDAR_N.
+        from (str, optional): First day of the range, e.g. '2025-12-01'.
+        to (str, optional): Last day of the range, e.g. '2026-03-31'.
+        h_type (str, optional): Only holidays of this type.
+
+    Returns:
+        Response: A JSON object with the holidays under 'feriados', or
+        an error message with status code 400 if a parameter is invalid.
+    """
+    query = read_calendar_query(request.args)
+    with span('holiday_fetch'):
+        holidays = query_calendar(query)
+
+    with span('json_encode'):
+        return jsonify({"feriados": holidays})
+
+
+metrics = Registry()
+request_latency = metrics.histogram(
+    'peliculas_request_duration_seconds', 'Time spent answering requests, by route.', ('route', 'method'))
+request_count = metrics.counter(
+    'peliculas_requests_total', 'Requests answered, by route and status code.', ('route', 'method', 'status'))
+span_latency = metrics.histogram(
+    'peliculas_span_duration_seconds', 'Time spent in each step of a request, by route.', ('route', 'span'))
+metrics.collected(
+    'peliculas_catalog_movies', 'gauge', 'Movies in the catalog.',
+    lambda: [({}, len(peliculas))])
+metrics.collected(
+    'peliculas_search_cache_events_total', 'counter', 'Search response cache events.',
+    lambda: [({'event': event}, value) for event, value in search_cache.stats().items()
+             if event in ('hits', 'misses', 'evictions', 'invalidations')])
+metrics.collected(
+    'peliculas_in_flight_requests', 'gauge', 'Requests being answered right now.',
+    lambda: [({}, admission.in_flight)])
+metrics.collected(
+    'peliculas_rejected_requests_total', 'counter', 'Requests turned away for being over the concurrency cap.',
+    lambda: [({}, admission.rejected)])
+
+
+def upstream_samples() -> List[Tuple[dict, float]]:
+    stats = holiday_client.stats.snapshot()
+    return [
+        ({'outcome': 'ok'}, stats['calls'] - stats['errors']),
+        ({'outcome': 'error'}, stats['errors']),
+        ({'outcome': 'rejected'}, stats['rejected']),
+    ]
+
+
+def upstream_seconds() -> float:
+    stats = holiday_client.stats.snapshot()
+    return stats['avg_seconds'] * stats['calls']
+
+
+metrics.collected(
+    'peliculas_upstream_calls_total', 'counter', 'Calls to nolaborables, by outcome.', upstream_samples)
+metrics.collected(
+    'peliculas_upstream_duration_seconds_total', 'counter', 'Time spent waiting on nolaborables.',
+    lambda: [({}, upstream_seconds())])
+
+
+def span(name: str):
+    """
+    Time one step of the current request, as a 'with' block.
+
+    Args:
+        name (str): The step, e.g. 'holiday_fetch', 'catalog_lookup'
+            or 'json_encode'.
+    """
+    return span_latency.time((request.endpoint or 'unmatched', name))
+
+
+def start_request_timer() -> None:
+    g.request_start = time.perf_counter()
+
+
+def record_request_metrics(response: Response) -> Response:
+    start = g.pop('request_start', None)
+    if start is not None:
+        route = request.endpoint or 'unmatched'
+        request_latency.observe((route, request.method), time.perf_counter() - start)
+        request_count.inc((route, request.method, str(response.status_code)))
+    return response
+
+
+def get_metrics() -> Response:
+    """
+    Return the request metrics in the Prometheus text format.
+
+    Includes per-route latency histograms and request counters, the
+    time spent in each step of the holiday and search routes, and the
+    search cache, admission control and nolaborables counters.
+
+    Returns:
+        Response: The metrics as 'text/plain'.
+    """
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# NOTE - las rutas de feriados consultan nolaborables y el import masivo
+# escribe miles de filas, por eso tienen limites mas bajos que el resto
+RATE_LIMIT_DEFAULT = Rule(rate=20, burst=40)
+RATE_LIMIT_RULES = {
+    'film_for_holiday': Rule(rate=2, burst=10),
+    'film_for_holiday_type': Rule(rate=2, burst=10),
+    'film_for_holiday_batch': Rule(rate=2, burst=10),
+    'get_holiday_calendar': Rule(rate=2, burst=10),
+    'import_movies': Rule(rate=0.2, burst=2),
+}
+MAX_CONCURRENT_REQUESTS = int(os.environ.get('PELICULAS_MAX_CONCURRENT', 64))
+rate_limiter = RateLimiter(RATE_LIMIT_RULES, RATE_LIMIT_DEFAULT)
+rate_limiter.enabled = os.environ.get('PELICULAS_RATE_LIMIT', 'on') != 'off'
+admission = AdmissionControl(MAX_CONCURRENT_REQUESTS)
+# NOTE - al arrancar se descargan los feriados de este año y el proximo
+# y se mantienen frescos en segundo plano; PELICULAS_PREFETCH=off lo apaga
+PREFETCH_HOLIDAYS = os.environ.get('PELICULAS_PREFETCH', 'on') != 'off'
+holiday_prefetcher = HolidayPrefetcher()
+
+
+def admit_request() -> Optional[Response]:
+    """
+    Decide whether the current request may run, before its view does.
+
+    A client over its rate limit for the route gets a 429, and any
+    request arriving while MAX_CONCURRENT_REQUESTS are already running
+    gets a 503, both with a 'Retry-After' header. Clients are told
+    apart by their address.
+
+    Returns:
+        Optional[Response]: The rejection, or None to let it run.
+    """
+    retry_after = rate_limiter.check(request.endpoint, request.remote_addr)
+    if retry_after:
+        response = jsonify({"error": "Too many requests"})
+        response.status_code = 429
+        response.headers['Retry-After'] = str(math.ceil(retry_after))
+        return response
+    if not admission.try_enter():
+        response = jsonify({"error": "Server busy"})
+        response.status_code = 503
+        response.headers['Retry-After'] = '1'
+        return response
+    g.admitted = True
+    return None
+
+
+def release_request(error: Optional[BaseException] = None) -> None:
+    if g.pop('admitted', False):
+        admission.leave()
+
+
+app.before_request(start_request_timer)
+app.before_request(admit_request)
+app.after_request(record_request_metrics)
+app.teardown_request(release_request)
+app.register_error_handler(InvalidPageArgs, invalid_page_args)
+app.register_error_handler(requests.RequestException, holiday_service_unavailable)
 
 
 app.add_url_rule(
     '/peliculas',
     'get_all_movies',
-    get_all_movies,
+    conditional(get_all_movies),
+    methods=['GET']
+)
+
+
+app.add_url_rule(
+    '/peliculas/batch',
+    'get_movies_batch',
+    conditional(get_movies_batch),
+    methods=['GET', 'POST']
+)
+
+
+app.add_url_rule(
+    '/peliculas/bulk',
+    'import_movies',
+    import_movies,
+    methods=['POST']
+)
+
+
+app.add_url_rule(
+    '/peliculas/export',
+    'export_movies',
+    conditional(export_movies),
     methods=['GET']
 )
 
@@ -346,7 +1287,7 @@ app.add_url_rule(
 app.add_url_rule(
     '/peliculas/<int:id>',
     'get_movie',
-    get_movie,
+    conditional(get_movie),
     methods=['GET']
 )
 
@@ -378,7 +1319,7 @@ app.add_url_rule(
 app.add_url_rule(
     '/peliculas/get_movie_by_genre',
     'get_movie_by_genre',
-    get_movie_by_genre,
+    conditional(get_movie_by_genre),
     methods=['GET']
 )
 
@@ -386,7 +1327,23 @@ app.add_url_rule(
 app.add_url_rule(
     '/peliculas/get_movie_by_title_keyword',
     'get_movie_by_title_keyword',
-    get_movie_by_title_keyword,
+    conditional(get_movie_by_title_keyword),
+    methods=['GET']
+)
+
+
+app.add_url_rule(
+    '/peliculas/cache_stats',
+    'get_search_cache_stats',
+    get_search_cache_stats,
+    methods=['GET']
+)
+
+
+app.add_url_rule(
+    '/metrics',
+    'get_metrics',
+    get_metrics,
     methods=['GET']
 )
 
@@ -419,6 +1376,20 @@ app.add_url_rule(
     film_for_holiday_type,
     methods=['GET'])
 
+app.add_url_rule(
+    '/peliculas/holiday_batch',
+    'film_for_holiday_batch',
+    film_for_holiday_batch,
+    methods=['GET'])
+
+app.add_url_rule(
+    '/feriados',
+    'get_holiday_calendar',
+    get_holiday_calendar,
+    methods=['GET'])
+
 
 if __name__ == '__main__':
+    if PREFETCH_HOLIDAYS:
+        holiday_prefetcher.start()
     app.run()
@@ -0,0 +1,180 @@
+"""
+Request metrics in the Prometheus text exposition format.
+
+Histograms and counters keep one series per tuple of label values.
+Recording a value is a bisect over the bucket bounds and a few
+additions under a lock, so it can run on every request. Values that
+other objects already track (cache stats, upstream call counters) are
+exported through collectors, which are only called while rendering.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+# NOTE - de medio milisegundo a 10 segundos, alcanza para ver tanto
+# lecturas del catalogo como llamadas lentas a nolaborables
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value: object) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """
+    Distribution of observed values, such as latencies in seconds.
+
+    Args:
+        name (str): The metric name.
+        help (str): Its description.
+        label_names (Sequence[str]): The names of its labels.
+        buckets (Sequence[float], optional): Upper bounds of the buckets.
+    """
+
+    type = 'histogram'
+
+    def __init__(self, name: str, help: str, label_names: Sequence[str],
+                 buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # NOTE - por serie: cuentas por bucket (sin acumular), suma, total
+        self._series: Dict[tuple, List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float) -> None:
+        position = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][position] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, labels: tuple) -> Iterator[None]:
+        """Observe the seconds the 'with' block takes."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(labels, time.perf_counter() - start)
+
+    def samples(self) -> Iterator[Sample]:
+        with self._lock:
+            series = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+        for labels, counts, total, count in sorted(series):
+            named = dict(zip(self.label_names, labels))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                yield f'{self.name}_bucket', dict(named, le=_format_value(float(bound))), cumulative
+            yield f'{self.name}_sum', named, total
+            yield f'{self.name}_count', named, count
+
+
+class Counter:
+    """
+    Monotonic count of events, such as requests by status code.
+
+    Args:
+        name (str): The metric name.
+        help (str): Its description.
+        label_names (Sequence[str]): The names of its labels.
+    """
+
+    type = 'counter'
+
+    def __init__(self, name: str, help: str, label_names: Sequence[str]) -> None:
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> Iterator[Sample]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield self.name, dict(zip(self.label_names, labels)), value
+
+
+class Collected:
+    """
+    Metric whose samples are read from elsewhere at render time.
+
+    Args:
+        name (str): The metric name.
+        type (str): 'counter' or 'gauge'.
+        help (str): Its description.
+        collect (Callable[[], Iterable[Tuple[Dict[str, str], float]]]):
+            Returns (labels, value) pairs.
+    """
+
+    def __init__(self, name: str, type: str, help: str,
+                 collect: Callable[[], Iterable[Tuple[Dict[str, str], float]]]) -> None:
+        self.name = name
+        self.type = type
+        self.help = help
+        self.collect = collect
+
+    def samples(self) -> Iterator[Sample]:
+        for labels, value in self.collect():
+            yield self.name, labels, value
+
+
+class Registry:
+    """The set of metrics a /metrics endpoint renders."""
+
+    def __init__(self) -> None:
+        self.metrics: list = []
+
+    def histogram(self, name: str, help: str, label_names: Sequence[str], **kwargs) -> Histogram:
+        return self.register(Histogram(name, help, label_names, **kwargs))
+
+    def counter(self, name: str, help: str, label_names: Sequence[str]) -> Counter:
+        return self.register(Counter(name, help, label_names))
+
+    def collected(self, name: str, type: str, help: str, collect: Callable) -> Collected:
+        return self.register(Collected(name, type, help, collect))
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text format (0.0.4).
+
+        Returns:
+            str: The exposition text.
+        """
+        lines = []
+        for metric in self.metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
@@ -1,8 +1,303 @@
-import requests
-from datetime import date
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+from holiday_client import holiday_client
+
+# NOTE - los feriados de un año casi nunca cambian, con refrescarlos
+# cada unas horas alcanza
+CACHE_TTL = 6 * 60 * 60
+# NOTE - el prefetch refresca cada año cuando paso esta fraccion del
+# TTL, asi ningun request llega a ver una entrada vencida
+PREFETCH_AHEAD = 0.75
+# NOTE - si nolaborables falla, el prefetch reintenta a este ritmo
+PREFETCH_RETRY = 60
+# NOTE - nolaborables solo publica los feriados ya decretados, asi que
+# "los proximos N" miran este año y el siguiente, como NextHoliday
+CALENDAR_YEARS_AHEAD = 1
+# NOTE - cada año de un rango es una descarga, acotamos cuantos se piden
+MAX_CALENDAR_YEARS = 3
+# NOTE - y cada año distinto queda en la cache para siempre (y si falla
+# suma al circuit breaker), asi que los rangos no pueden ir mas atras
+CALENDAR_YEARS_BACK = 5
+# NOTE - apuntarlo a un fake_nolaborables local permite probar y medir
+# las rutas de feriados sin depender de la API real
+NOLABORABLES_BASE_URL = os.environ.get('NOLABORABLES_BASE_URL', 'https://nolaborables.com.ar')
 
 def get_url(year):
-    return f"https://nolaborables.com.ar/api/v2/feriados/{year}"
+    return f"{NOLABORABLES_BASE_URL.rstrip('/')}/api/v2/feriados/{year}"
+
+def download_holidays(year):
+    return holiday_client.get_json(get_url(year))
+
+
+class HolidayTimeline:
+    """
+    Holidays of one year sorted by date, plus one sorted list per
+    holiday type, so the next holiday after a given day is a binary
+    search instead of a scan.
+
+    When the year is known, 'days' also holds each holiday as a
+    calendar entry, with its ISO date, weekday and month names already
+    computed, and 'ordinals' their date ordinals, for HolidayCalendar.
+    """
+
+    def __init__(self, holidays, year=None):
+        self.holidays = sorted(holidays, key=lambda h: (h['mes'], h['dia']))
+        self.dates = [(h['mes'], h['dia']) for h in self.holidays]
+        self.by_type = {}
+        for holiday in self.holidays:
+            dates, of_type = self.by_type.setdefault(holiday['tipo'].lower(), ([], []))
+            dates.append((holiday['mes'], holiday['dia']))
+            of_type.append(holiday)
+
+        self.year = year
+        self.days = []
+        self.ordinals = []
+        self.days_by_type = {}
+        if year is not None:
+            for holiday in self.holidays:
+                when = date(year, holiday['mes'], holiday['dia'])
+                day = dict(holiday, fecha=when.isoformat(), dia_semana=days[when.weekday()],
+                           nombre_mes=months[when.month - 1])
+                self.days.append(day)
+                self.ordinals.append(when.toordinal())
+                ordinals, of_type = self.days_by_type.setdefault(holiday['tipo'].lower(), ([], []))
+                ordinals.append(when.toordinal())
+                of_type.append(day)
+
+    def days_between(self, first, last, type=None):
+        """
+        Return the calendar entries from one date ordinal to another.
+
+        Args:
+            first (int): The first date ordinal, included.
+            last (int): The last date ordinal, included.
+            type (str, optional): Only holidays of this type.
+
+        Returns:
+            list: The entries, sorted by date.
+        """
+        if type is None:
+            ordinals, entries = self.ordinals, self.days
+        else:
+            ordinals, entries = self.days_by_type.get(type.lower(), ([], []))
+        return entries[bisect_left(ordinals, first):bisect_right(ordinals, last)]
+
+    def next_after(self, month, day, type=None):
+        if type is None:
+            dates, holidays = self.dates, self.holidays
+        else:
+            dates, holidays = self.by_type.get(type.lower(), ([], []))
+        position = bisect_right(dates, (month, day))
+        return holidays[position] if position < len(holidays) else None
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.error = None
+
+
+class HolidayCache:
+    """
+    Process-wide cache of the HolidayTimeline of each year.
+
+    A year is downloaded at most once per 'ttl' seconds. Concurrent
+    misses for the same year share a single download (single-flight),
+    and once an entry expires it keeps being served while a background
+    thread refreshes it (stale-while-revalidate). 'fetch' receives a
+    year and returns its holiday list; tests pass a fake one so no
+    request reaches nolaborables.
+    """
+
+    def __init__(self, fetch=download_holidays, ttl=CACHE_TTL, clock=time.monotonic):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = {}
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def get(self, year):
+        with self._lock:
+            entry = self._entries.get(year)
+            if entry is not None:
+                timeline, fetched_at = entry
+                if self.clock() - fetched_at >= self.ttl and year not in self._flights:
+                    self._flights[year] = _Flight()
+                    threading.Thread(target=self._refresh, args=(year,), daemon=True).start()
+                return timeline
+
+            flight, leader = self._join(year)
+        return self._wait(year, flight, leader)
+
+    def refresh(self, year):
+        """
+        Download a year now, even if its entry is still fresh.
+
+        Joins the download already in flight for that year, if any.
+
+        Args:
+            year (int): The year.
+
+        Returns:
+            HolidayTimeline: The new timeline.
+        """
+        with self._lock:
+            flight, leader = self._join(year)
+        return self._wait(year, flight, leader)
+
+    def age(self, year):
+        # NOTE - segundos desde la ultima descarga del año, None si no esta
+        with self._lock:
+            entry = self._entries.get(year)
+        return None if entry is None else self.clock() - entry[1]
+
+    def peek(self, year):
+        # NOTE - para quien descarga por su cuenta (ej. el modo asincronico):
+        # devuelve (timeline, fresco) sin descargar nada
+        with self._lock:
+            entry = self._entries.get(year)
+        if entry is None:
+            return None, False
+        timeline, fetched_at = entry
+        return timeline, self.clock() - fetched_at < self.ttl
+
+    def store(self, year, holidays):
+        timeline = HolidayTimeline(holidays, year)
+        with self._lock:
+            self._entries[year] = (timeline, self.clock())
+        return timeline
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _join(self, year):
+        # NOTE - llamar con el lock tomado
+        flight = self._flights.get(year)
+        leader = flight is None
+        if leader:
+            flight = self._flights[year] = _Flight()
+        return flight, leader
+
+    def _wait(self, year, flight, leader):
+        if leader:
+            self._refresh(year)
+        else:
+            flight.done.wait()
+
+        if flight.error is not None:
+            raise flight.error
+        with self._lock:
+            return self._entries[year][0]
+
+    def _refresh(self, year):
+        with self._lock:
+            flight = self._flights[year]
+        try:
+            timeline = HolidayTimeline(self.fetch(year), year)
+        except Exception as error:
+            # NOTE - si habia datos viejos se siguen sirviendo hasta el
+            # proximo intento
+            flight.error = error
+        else:
+            with self._lock:
+                self._entries[year] = (timeline, self.clock())
+        finally:
+            with self._lock:
+                del self._flights[year]
+            flight.done.set()
+
+
+holiday_cache = HolidayCache()
+
+
+class HolidayPrefetcher:
+    """
+    Keeps this year's and next year's holidays cached ahead of requests.
+
+    warm_up() downloads both years before the app starts serving, and
+    a background thread refreshes each one once 'ahead' of the cache
+    TTL has passed, so entries never expire under a request. The years
+    are recomputed on every run, and the thread wakes up right after
+    New Year, so the cache rolls over to the new pair of years before
+    anyone asks for them. Failed downloads are retried every 'retry'
+    seconds while the cache keeps serving what it had.
+
+    Args:
+        cache (HolidayCache, optional): The cache to fill. Defaults to
+            the process-wide holiday_cache.
+        ahead (float, optional): Fraction of the TTL after which a year
+            is refreshed.
+        retry (float, optional): Seconds between retries after a
+            failed download.
+        now (Callable[[], datetime], optional): Time source, for tests.
+    """
+
+    def __init__(self, cache=None, ahead=PREFETCH_AHEAD, retry=PREFETCH_RETRY, now=datetime.now):
+        self._cache = cache
+        self.ahead = ahead
+        self.retry = retry
+        self.now = now
+        self.errors = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def cache(self):
+        return self._cache if self._cache is not None else holiday_cache
+
+    def years(self):
+        year = self.now().year
+        return year, year + 1
+
+    def warm_up(self):
+        """
+        Download the years that are missing or due for a refresh.
+
+        Returns:
+            float: Seconds until the next run should happen.
+        """
+        cache = self.cache
+        wait = cache.ttl * self.ahead
+        for year in self.years():
+            age = cache.age(year)
+            if age is None or age >= cache.ttl * self.ahead:
+                try:
+                    cache.refresh(year)
+                except Exception as error:
+                    self.errors[year] = error
+                    wait = min(wait, self.retry)
+                    continue
+                self.errors.pop(year, None)
+                age = 0.0
+            wait = min(wait, cache.ttl * self.ahead - age)
+
+        # NOTE - +1 segundo para despertar ya en el año nuevo
+        now = self.now()
+        new_year = datetime(now.year + 1, 1, 1, tzinfo=now.tzinfo)
+        return max(0.0, min(wait, (new_year - now).total_seconds() + 1))
+
+    def start(self):
+        """Warm the cache up, then keep it warm from a daemon thread."""
+        self._stop.clear()
+        wait = self.warm_up()
+        self._thread = threading.Thread(target=self._run, args=(wait,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, wait):
+        while not self._stop.wait(wait):
+            wait = self.warm_up()
 
 months = ['Enero','Febrero','Marzo','Abril','Mayo','Junio','Julio','Agosto','Septiembre','Octubre','Noviembre','Diciembre']
 days = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado','Domingo']
@@ -10,42 +305,108 @@ days = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado','Domingo
 def day_of_week(day, month, year):
     return days[date(year, month, day).weekday()]
 
+
+class HolidayCalendar:
+    """
+    Answers "next N", date range and by-type holiday queries.
+
+    It reads the HolidayTimeline of each year from the holiday cache,
+    whose calendar entries (ISO date, weekday and month names) are
+    built once per download, so a query is a binary search per year
+    plus a slice, and results span year boundaries.
+
+    Args:
+        cache (HolidayCache, optional): Where years are read from.
+            Defaults to the process-wide holiday_cache.
+    """
+
+    def __init__(self, cache=None):
+        self._cache = cache
+
+    @property
+    def cache(self):
+        return self._cache if self._cache is not None else holiday_cache
+
+    def upcoming(self, n, type=None, after=None):
+        """
+        Return the next 'n' holidays after a day.
+
+        Args:
+            n (int): How many holidays to return.
+            type (str, optional): Only holidays of this type.
+            after (date, optional): The day to start after, not
+                included. Defaults to today.
+
+        Returns:
+            list: Up to 'n' calendar entries, sorted by date. Fewer
+            when this year and the next have no more holidays.
+        """
+        after = after if after is not None else date.today()
+        found = []
+        for year in range(after.year, after.year + CALENDAR_YEARS_AHEAD + 1):
+            if len(found) >= n:
+                break
+            last = date(year, 12, 31).toordinal()
+            found.extend(self.cache.get(year).days_between(after.toordinal() + 1, last, type)[:n - len(found)])
+        return found
+
+    def between(self, first, last, type=None):
+        """
+        Return the holidays from one day to another, both included.
+
+        Args:
+            first (date): The first day.
+            last (date): The last day.
+            type (str, optional): Only holidays of this type.
+
+        Returns:
+            list: The calendar entries, sorted by date.
+
+        Raises:
+            ValueError: If 'last' is before 'first' or the range spans
+                more than MAX_CALENDAR_YEARS years.
+        """
+        if last < first:
+            raise ValueError("The range ends before it starts")
+        if last.year - first.year >= MAX_CALENDAR_YEARS:
+            raise ValueError(f"At most {MAX_CALENDAR_YEARS} years per range")
+        found = []
+        for year in range(first.year, last.year + 1):
+            found.extend(self.cache.get(year).days_between(first.toordinal(), last.toordinal(), type))
+        return found
+
+
 class NextHoliday:
-    def __init__(self):
+    def __init__(self, cache=None):
         self.loading = True
         self.year = date.today().year
         self.holiday = None
+        self.cache = cache if cache is not None else holiday_cache
 
-    def set_next(self, holidays, type=None):
+    def set_next(self, timeline, type=None):
         now = date.today()
-        today = {
-            'day': now.day,
-            'month': now.month
-        }
+        holiday = timeline.next_after(now.month, now.day, type)
 
-        
-        if type is None:
-            holiday = next(
-                (h for h in holidays if h['mes'] == today['month'] and h['dia'] > today['day'] 
-                or h['mes'] > today['month']), holidays[0])
+        # NOTE - si no quedan feriados este año buscamos el primero
+        # del año que viene
+        if holiday is None:
+            # NOTE - si no se puede descargar el año que viene el error
+            # sigue de largo, como cuando falla este año (503 en la API)
+            holiday = self.cache.get(self.year + 1).next_after(0, 0, type)
+            if holiday is not None:
+                self.year += 1
+
+        if holiday is not None:
             self.loading = False
         else:
-            holiday = next(
-                (h for h in holidays if (h['mes'] == today['month'] and h['dia'] > today['day'] or 
-                h['mes'] > today['month']) and h['tipo'].lower() == type.lower()), None)
+            holiday = f"No hay feriados para el año {self.year} de tipo {type}"
 
-            if holiday is not None:
-                self.loading = False
-            else:
-                holiday = f"No hay feriados para el año {self.year} de tipo {type}"
-        
         self.holiday = holiday
 
 
         # NOTE - type determina el tipo de feriado que buscamos
     def fetch_holidays(self, type=None):
-        response = requests.get(get_url(self.year))
-        data = response.json()
+        data = self.cache.get(self.year)
 
         # NOTE - if type != inamovible | trasladable | nolaborable | puente
         # then type = None 
@@ -0,0 +1,137 @@
+import threading
+import time
+from typing import Callable, Dict, Hashable, NamedTuple, Optional, Tuple
+
+# NOTE - por encima de esta cantidad de buckets barremos los que ya se
+# llenaron (clientes que dejaron de pedir), asi la memoria no crece sin fin
+MAX_BUCKETS = 100000
+
+
+class Rule(NamedTuple):
+    # NOTE - rate en tokens por segundo, burst es el tamaño del bucket
+    rate: float
+    burst: int
+
+
+class MemoryBackend:
+    """
+    Token buckets kept in this process's memory.
+
+    Every RateLimiter backend has the same take() method, so a
+    backend whose state is shared between processes can replace it
+    without touching the limiter; this one is the default and the
+    stand-in tests use.
+    """
+
+    def __init__(self, max_buckets: int = MAX_BUCKETS) -> None:
+        self.max_buckets = max_buckets
+        self._buckets: Dict[Hashable, Tuple[float, float, Rule]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: Hashable, rule: Rule, now: float) -> float:
+        """
+        Take one token from a bucket.
+
+        Args:
+            key (Hashable): The bucket, e.g. (route, client).
+            rule (Rule): Its refill rate and size.
+            now (float): The current time, in seconds.
+
+        Returns:
+            float: 0 if a token was taken, otherwise the seconds until
+            one is available.
+        """
+        with self._lock:
+            tokens, updated, _ = self._buckets.get(key, (rule.burst, now, rule))
+            tokens = min(rule.burst, tokens + (now - updated) * rule.rate)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now, rule)
+                return (1 - tokens) / rule.rate
+            if len(self._buckets) >= self.max_buckets and key not in self._buckets:
+                self._sweep(now)
+            self._buckets[key] = (tokens - 1, now, rule)
+            return 0.0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+    def _sweep(self, now: float) -> None:
+        full = [key for key, (tokens, updated, rule) in self._buckets.items()
+                if tokens + (now - updated) * rule.rate >= rule.burst]
+        for key in full:
+            del self._buckets[key]
+
+
+class RateLimiter:
+    """
+    Per-client, per-route token bucket rate limiter.
+
+    Each (route, client) pair has its own bucket, refilled at the
+    route's rule rate up to its burst size; routes without a rule of
+    their own use 'default'. Requests are answered from the bucket in
+    constant time, so the limiter can run before every request.
+
+    Args:
+        rules (Dict[str, Rule]): Rules by Flask endpoint name.
+        default (Rule): The rule of every other route.
+        backend (optional): Where buckets are kept. Defaults to a new
+            MemoryBackend.
+        clock (Callable[[], float], optional): Time source, for tests.
+    """
+
+    def __init__(self, rules: Dict[str, Rule], default: Rule, backend=None,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.rules = rules
+        self.default = default
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.clock = clock
+        self.enabled = True
+
+    def check(self, route: Optional[str], client: Optional[str]) -> float:
+        """
+        Count one request of a client to a route.
+
+        Args:
+            route (str): The Flask endpoint name.
+            client (str): The client address.
+
+        Returns:
+            float: 0 if the request is allowed, otherwise the seconds
+            the client should wait before retrying.
+        """
+        if not self.enabled:
+            return 0.0
+        rule = self.rules.get(route, self.default)
+        return self.backend.take((route, client), rule, self.clock())
+
+
+class AdmissionControl:
+    """
+    Global cap on the number of requests handled at once.
+
+    Requests over the cap are turned away immediately instead of
+    queueing for a worker, so an overloaded server sheds load with
+    fast errors rather than with timeouts.
+
+    Args:
+        max_concurrent (int): How many requests may run at once.
+    """
+
+    def __init__(self, max_concurrent: int) -> None:
+        self.max_concurrent = max_concurrent
+        self.in_flight = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def try_enter(self) -> bool:
+        with self._lock:
+            if self.in_flight >= self.max_concurrent:
+                self.rejected += 1
+                return False
+            self.in_flight += 1
+            return True
+
+    def leave(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
@@ -0,0 +1,133 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from flask import Response
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    status: int
+    headers: List[Tuple[str, str]]
+
+    def to_response(self) -> Response:
+        return Response(self.body, status=self.status, headers=self.headers)
+
+
+class ResponseCache:
+    """
+    Bounded LRU cache of already encoded responses.
+
+    Each entry is stored under a normalized query key together with a
+    set of tags describing which data it was built from, so writes can
+    evict exactly the entries they affect (see invalidate and
+    invalidate_where). Entries are only stored if the data version
+    they were built from is still current, so a response computed
+    while a write was invalidating the cache is never kept. After
+    applying a write's invalidations the owner calls synced() with
+    that write's version; until then the data version is ahead of the
+    cache and every lookup is a miss, so a request that already sees
+    the new version (e.g. in its ETag) never gets a body from before
+    the write.
+
+    Args:
+        maxsize (int): The maximum number of entries.
+        version (Callable[[], int]): Returns the current data version.
+    """
+
+    def __init__(self, maxsize: int, version: Callable[[], int]) -> None:
+        self.maxsize = maxsize
+        self.version = version
+        self._synced = version()
+        self._entries: 'OrderedDict[Hashable, Tuple[CachedResponse, Tuple[Hashable, ...]]]' = OrderedDict()
+        self._by_tag: Dict[Hashable, Set[Hashable]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key) if self._synced == self.version() else None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, tags: Iterable[Hashable], response: Response, version: int) -> None:
+        """
+        Store an encoded copy of a response.
+
+        Args:
+            key (Hashable): The normalized query.
+            tags (Iterable[Hashable]): What the response was built from.
+            response (Response): A non-streamed response.
+            version (int): The data version read before building it.
+        """
+        cached = CachedResponse(
+            response.get_data(),
+            response.status_code,
+            [(name, value) for name, value in response.headers if name != 'Content-Length'],
+        )
+        tags = tuple(tags)
+        with self._lock:
+            if version != self.version():
+                return
+            self._discard(key)
+            self._entries[key] = (cached, tags)
+            for tag in tags:
+                self._by_tag.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._discard(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, tags: Iterable[Hashable]) -> None:
+        """Evict every entry carrying any of the given tags."""
+        with self._lock:
+            for tag in tags:
+                for key in list(self._by_tag.get(tag, ())):
+                    self._discard(key)
+                    self.invalidations += 1
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        """Evict every entry carrying a tag for which predicate is true."""
+        with self._lock:
+            for tag in [tag for tag in self._by_tag if predicate(tag)]:
+                for key in list(self._by_tag.get(tag, ())):
+                    self._discard(key)
+                    self.invalidations += 1
+
+    def synced(self, version: int) -> None:
+        """Record that every write up to 'version' has been invalidated."""
+        with self._lock:
+            self._synced = version
+
+    def clear(self) -> None:
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._by_tag.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+    def _discard(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[1]:
+            keys = self._by_tag[tag]
+            keys.discard(key)
+            if not keys:
+                del self._by_tag[tag]
@@ -0,0 +1,213 @@
+import heapq
+import random
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from movie import Movie
+
+# NOTE - cada cuanto se reconstruyen las tablas ponderadas, reconstruir
+# en cada request costaria O(n)
+POPULARITY_REFRESH = 5.0
+# NOTE - sorteos por pelicula pedida antes de dejar de rechazar repetidos
+MAX_DRAWS_PER_ITEM = 8
+
+
+class DenseIndex:
+    """
+    Set of IDs kept in a dense list, for constant time random draws.
+
+    A dict maps each ID to its position in the list. Removing an ID
+    moves the last one into its slot (swap-remove), so adds, removes
+    and single draws all take constant time and the list never has
+    gaps. The order of the list is arbitrary.
+
+    It is not thread-safe on its own; MovieCatalog only touches it
+    under its lock.
+    """
+
+    __slots__ = ('_ids', '_positions')
+
+    def __init__(self) -> None:
+        self._ids: List[int] = []
+        self._positions: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, id: object) -> bool:
+        return id in self._positions
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._ids)
+
+    def add(self, id: int) -> None:
+        if id not in self._positions:
+            self._positions[id] = len(self._ids)
+            self._ids.append(id)
+
+    def discard(self, id: int) -> None:
+        position = self._positions.pop(id, None)
+        if position is None:
+            return
+        last = self._ids.pop()
+        if last != id:
+            self._ids[position] = last
+            self._positions[last] = position
+
+    def sample(self, k: int) -> List[int]:
+        """
+        Return up to 'k' distinct IDs chosen uniformly at random.
+
+        Args:
+            k (int): How many IDs to draw.
+
+        Returns:
+            List[int]: The IDs, in random order.
+        """
+        if k == 1 and self._ids:
+            return [self._ids[random.randrange(len(self._ids))]]
+        return random.sample(self._ids, min(k, len(self._ids)))
+
+
+class AliasTable:
+    """
+    Weighted random draws in constant time (Vose's alias method).
+
+    Building the table takes time proportional to the number of items;
+    after that each draw is one uniform random number and at most two
+    lookups, no matter how many items there are.
+
+    Args:
+        items (Sequence[int]): The items to draw from.
+        weights (Sequence[float]): Their positive weights.
+    """
+
+    def __init__(self, items: Sequence[int], weights: Sequence[float]) -> None:
+        count = len(items)
+        total = sum(weights)
+        self.items = list(items)
+        self.weights = list(weights)
+        self._probability = [1.0] * count
+        self._alias = list(range(count))
+        scaled = [weight * count / total for weight in weights] if total else []
+        small = [position for position, weight in enumerate(scaled) if weight < 1.0]
+        large = [position for position, weight in enumerate(scaled) if weight >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self._probability[less] = scaled[less]
+            self._alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+        # NOTE - lo que queda en small/large vale 1 salvo error de redondeo
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def draw(self) -> int:
+        position = random.randrange(len(self.items))
+        if random.random() >= self._probability[position]:
+            position = self._alias[position]
+        return self.items[position]
+
+
+class PopularitySampler:
+    """
+    Popularity-weighted sampling of movie IDs.
+
+    Views are counted per ID with record(), and each movie weighs one
+    plus its views, so movies nobody looked at can still be drawn. One
+    AliasTable is kept per genre (and one for the whole catalog); it
+    is built on first use and rebuilt at most once per 'refresh'
+    seconds, so draws cost constant time. Tables of empty genres are
+    not kept, so unknown genres cannot grow the cache. Between rebuilds
+    a draw may return a movie that was removed or moved to another
+    genre, and never returns one added since; callers must check the
+    IDs they get.
+
+    Args:
+        population (Callable[[Optional[str]], List[int]]): Returns the
+            IDs of the movies of a casefolded genre, or of the whole
+            catalog for None.
+        refresh (float, optional): Seconds a table is reused for.
+        clock (Callable[[], float], optional): Time source, for tests.
+    """
+
+    def __init__(self, population: Callable[[Optional[str]], List[int]],
+                 refresh: float = POPULARITY_REFRESH, clock: Callable[[], float] = time.monotonic) -> None:
+        self.population = population
+        self.refresh = refresh
+        self.clock = clock
+        self._views: Counter = Counter()
+        self._tables: Dict[Hashable, Tuple[AliasTable, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, id: int) -> None:
+        """Count one view of a movie."""
+        with self._lock:
+            self._views[id] += 1
+
+    def views(self, id: int) -> int:
+        with self._lock:
+            return self._views[id]
+
+    def forget(self, changes: Iterable[Tuple[Optional[Movie], Optional[Movie]]]) -> None:
+        """
+        Drop the view counts of removed movies.
+
+        Args:
+            changes (Iterable): (old, new) record pairs, as passed to
+                MovieCatalog listeners.
+        """
+        with self._lock:
+            for old_movie, new_movie in changes:
+                if new_movie is None and old_movie is not None:
+                    self._views.pop(old_movie.id, None)
+
+    def sample(self, k: int, genre: Optional[str] = None) -> List[int]:
+        """
+        Return up to 'k' distinct IDs drawn with popularity weights.
+
+        Args:
+            k (int): How many IDs to draw.
+            genre (str, optional): The casefolded genre to draw from.
+                Defaults to the whole catalog.
+
+        Returns:
+            List[int]: The IDs, most likely the popular ones first.
+        """
+        table = self._table(genre)
+        if not len(table):
+            return []
+        if k * 2 < len(table):
+            chosen: Dict[int, None] = {}
+            for _ in range(MAX_DRAWS_PER_ITEM * k):
+                chosen[table.draw()] = None
+                if len(chosen) == k:
+                    return list(chosen)
+        # NOTE - si se pide casi todo, o unas pocas peliculas se llevan
+        # casi todo el peso, rechazar repetidos sale caro: ordenamos con
+        # claves ponderadas (Efraimidis-Spirakis), que da la misma
+        # distribucion en O(n log k)
+        keys = ((random.random() ** (1.0 / weight), id) for id, weight in zip(table.items, table.weights))
+        return [id for _, id in heapq.nlargest(k, keys)]
+
+    def _table(self, genre: Optional[str]) -> AliasTable:
+        now = self.clock()
+        with self._lock:
+            entry = self._tables.get(genre)
+            if entry is not None and now - entry[1] < self.refresh:
+                return entry[0]
+        ids = self.population(genre)
+        with self._lock:
+            weights = [1.0 + self._views[id] for id in ids]
+        table = AliasTable(ids, weights)
+        # NOTE - el genero viene del query string: no guardamos tablas
+        # vacias, asi solo se cachean generos que existen
+        with self._lock:
+            if ids:
+                self._tables[genre] = (table, now)
+            else:
+                self._tables.pop(genre, None)
+        return table
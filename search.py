@@ -0,0 +1,179 @@
+from typing import Dict, Iterator, List, Optional, Set
+from bisect import bisect_left, bisect_right, insort
+from itertools import groupby, islice, takewhile
+import heapq
+
+GRAM_SIZE = 3
+
+
+def grams(text: str) -> Set[str]:
+    """
+    Return every substring of 'text' of length GRAM_SIZE.
+
+    Args:
+        text (str): An already lowercased string.
+
+    Returns:
+        Set[str]: The trigrams of the string, none if it is shorter.
+    """
+    return {text[start:start + GRAM_SIZE] for start in range(len(text) - GRAM_SIZE + 1)}
+
+
+class TitleIndex:
+    """
+    N-gram index for case-insensitive substring search over titles.
+
+    Every title is lowercased once, when it is indexed, and split
+    into its trigrams; each trigram keeps the sorted list of the IDs
+    whose title contains it. A keyword of three characters or more is
+    answered by walking the shortest posting list of its trigrams in
+    ID order and verifying each candidate with a substring check.
+    Shorter keywords are contained in a title exactly when they are
+    contained in one of its trigrams, so they are answered by merging,
+    in ID order, the postings of every trigram key that contains them;
+    titles too short to have trigrams are kept apart and checked
+    directly. Either way results are the same as
+    'kw.lower() in titulo.lower()', and since candidates come in ID
+    order a search stops as soon as it has 'limit' matches.
+
+    Only trigrams are indexed: shorter grams would add a posting for
+    almost every movie under each of a few dozen keys, multiplying the
+    memory of the index, and short keywords match most of the catalog
+    anyway.
+    """
+
+    def __init__(self) -> None:
+        self._titles: Dict[int, str] = {}
+        self._postings: Dict[str, List[int]] = {}
+        # NOTE - ids de titulos de menos de GRAM_SIZE caracteres, sin
+        # trigramas, tambien ordenados
+        self._short: List[int] = []
+
+    def add(self, id: int, title: str) -> None:
+        """
+        Index a title under the given movie ID, replacing any
+        previous title stored for it.
+
+        Args:
+            id (int): The unique ID of the movie.
+            title (str): The movie title.
+        """
+        lowered = title.lower()
+        self.remove(id)
+        self._titles[id] = lowered
+        if len(lowered) < GRAM_SIZE:
+            _insert(self._short, id)
+        for gram in grams(lowered):
+            _insert(self._postings.setdefault(gram, []), id)
+
+    def remove(self, id: int) -> None:
+        """
+        Drop the title indexed under the given movie ID, if any.
+
+        Args:
+            id (int): The unique ID of the movie.
+        """
+        lowered = self._titles.pop(id, None)
+        if lowered is None:
+            return
+        if len(lowered) < GRAM_SIZE:
+            _discard(self._short, id)
+        for gram in grams(lowered):
+            posting = self._postings[gram]
+            _discard(posting, id)
+            if not posting:
+                del self._postings[gram]
+
+    def search(self, kw: str, limit: Optional[int] = None, after_id: int = 0) -> List[int]:
+        """
+        Return the IDs whose title contains the keyword.
+
+        Args:
+            kw (str): The keyword to look for, case-insensitive.
+            limit (int, optional): Stop after this many matches.
+            after_id (int, optional): Only IDs greater than this one.
+
+        Returns:
+            List[int]: Matching IDs in increasing order.
+        """
+        return list(islice(self.iter_matches(kw, after_id), limit))
+
+    def iter_matches(self, kw: str, after_id: int = 0) -> Iterator[int]:
+        """
+        Yield the IDs whose title contains the keyword, lazily and in
+        increasing order.
+
+        The index must not change while the iterator is in use.
+
+        Args:
+            kw (str): The keyword to look for, case-insensitive.
+            after_id (int, optional): Only IDs greater than this one.
+
+        Returns:
+            Iterator[int]: The matching IDs.
+        """
+        kw = kw.lower()
+        titles = self._titles
+        return (id for id in self._candidates(kw, after_id) if kw in titles[id])
+
+    def count(self, kw: str, up_to_id: Optional[int] = None) -> int:
+        """
+        Count the IDs whose title contains the keyword, without
+        building the list of matches.
+
+        Args:
+            kw (str): The keyword to look for, case-insensitive.
+            up_to_id (int, optional): Only IDs not greater than this one.
+
+        Returns:
+            int: The number of matches.
+        """
+        kw = kw.lower()
+        if len(kw) >= GRAM_SIZE:
+            matches = self.iter_matches(kw)
+            if up_to_id is not None:
+                matches = takewhile(lambda id: id <= up_to_id, matches)
+            return sum(1 for _ in matches)
+        # NOTE - para contar no hace falta el orden: la union de sets es
+        # bastante mas rapida que mezclar cientos de listas
+        end = (lambda posting: len(posting)) if up_to_id is None else (
+            lambda posting: bisect_right(posting, up_to_id))
+        ids = set().union(*(islice(posting, end(posting))
+                            for gram, posting in self._postings.items() if kw in gram))
+        ids.update(id for id in islice(self._short, end(self._short)) if kw in self._titles[id])
+        return len(ids)
+
+    def _candidates(self, kw: str, after_id: int) -> Iterator[int]:
+        # NOTE - ids en orden creciente y sin repetir que pueden
+        # contener kw (ya en minusculas); falta verificarlos
+        if len(kw) < GRAM_SIZE:
+            postings = [posting for gram, posting in self._postings.items() if kw in gram]
+            postings.append(self._short)
+            merged = heapq.merge(*(islice(posting, bisect_right(posting, after_id), None)
+                                   for posting in postings))
+            return (id for id, _ in groupby(merged))
+
+        shortest = None
+        for start in range(len(kw) - GRAM_SIZE + 1):
+            posting = self._postings.get(kw[start:start + GRAM_SIZE])
+            if not posting:
+                return iter(())
+            if shortest is None or len(posting) < len(shortest):
+                shortest = posting
+        # NOTE - alcanza con recorrer la lista mas corta: la verificacion
+        # de substring ya implica todos los demas trigramas
+        return islice(shortest, bisect_right(shortest, after_id), None)
+
+
+def _insert(ids: List[int], id: int) -> None:
+    # NOTE - los ids nuevos casi siempre son los mas altos
+    if not ids or ids[-1] < id:
+        ids.append(id)
+    else:
+        insort(ids, id)
+
+
+def _discard(ids: List[int], id: int) -> None:
+    position = bisect_left(ids, id)
+    if position < len(ids) and ids[position] == id:
+        del ids[position]
@@ -0,0 +1,306 @@
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, Optional, Tuple
+from movie import Movie
+
+# NOTE - cuantas escrituras juntamos como maximo en una sola transaccion
+MAX_BATCH = 1000
+# NOTE - cuantos ids reserva cada proceso por vez en la base
+ID_BLOCK = 1000
+# NOTE - reintentos de un commit que falla con un error pasajero
+# (SQLITE_BUSY de otro proceso, por ejemplo), con espera creciente
+WRITE_RETRIES = 5
+RETRY_DELAY = 0.05
+
+
+class SQLiteStorage:
+    """
+    Durable storage for the movie catalog backed by SQLite.
+
+    The 'peliculas' table always holds the current state of the
+    catalog (it is its own compacted snapshot), so loading it at
+    startup costs time proportional to the number of movies, not to
+    the number of writes ever made.
+
+    New IDs are reserved from the database in blocks of ID_BLOCK
+    (allocate_ids bumps the stored next ID in a single statement and
+    hands the block out from memory), so they are not reused after a
+    restart, processes sharing the file never hand out the same one,
+    and only one add in ID_BLOCK waits for a commit of its own. The
+    unused rest of a block is given back on close() if no other
+    process reserved after it; otherwise it is skipped. New movies are
+    stored with a plain INSERT, so a clashing ID fails the write loudly
+    instead of replacing another movie. Each process still serves the
+    catalog it loaded at startup: writes made by other processes are
+    only seen after a restart.
+
+    Writes are group-committed: they are queued and a single writer
+    thread applies everything queued so far in one transaction, so a
+    burst of concurrent writes shares one fsync. Each write returns a
+    ticket, and writers block until their ticket is committed unless
+    'wait' is False. A commit failing with a transient error (such as
+    SQLITE_BUSY while another process writes) is retried; if it keeps
+    failing its writes are dropped, waiting on their tickets raises,
+    'failures' is incremented and the writer goes on with the next
+    writes.
+
+    Args:
+        path (str): The SQLite database file.
+        wait (bool, optional): Block writers until their write is
+            durable. Defaults to True.
+    """
+
+    def __init__(self, path: str, wait: bool = True) -> None:
+        self.path = path
+        self.wait = wait
+        # NOTE - cada elemento son las operaciones de una escritura, que
+        # nunca se reparten entre dos transacciones
+        self._queue: List[List[tuple]] = []
+        self._queued = 0
+        self._committed = 0
+        # NOTE - rangos (desde, hasta] de tickets cuyo commit fallo
+        self._lost: List[Tuple[int, int, BaseException]] = []
+        self.failures = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        # NOTE - conexion propia para asignar ids, que se piden de forma
+        # sincronica y no pueden esperar a la cola de escrituras
+        self._ids = self._connect(check_same_thread=False)
+        self._ids_lock = threading.Lock()
+        self._next_free = self._block_end = 0
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS peliculas "
+                "(id INTEGER PRIMARY KEY, titulo TEXT NOT NULL, genero TEXT NOT NULL)")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            connection.execute("INSERT OR IGNORE INTO meta VALUES ('next_id', 1)")
+        connection.close()
+        self._writer = threading.Thread(target=self._write_loop, name='catalog-writer', daemon=True)
+        self._writer.start()
+
+    def load(self) -> Tuple[List[Movie], int]:
+        """
+        Read the stored catalog.
+
+        Returns:
+            Tuple[List[Movie], int]: The movies ordered by ID and the
+            next ID to hand out.
+        """
+        connection = self._connect()
+        try:
+            movies = [
+                Movie(id, titulo, genero)
+                for id, titulo, genero in connection.execute(
+                    "SELECT id, titulo, genero FROM peliculas ORDER BY id")
+            ]
+            next_id, = connection.execute("SELECT value FROM meta WHERE key = 'next_id'").fetchone()
+        finally:
+            connection.close()
+        return movies, next_id
+
+    def allocate_ids(self, count: int, at_least: int = 1) -> int:
+        """
+        Hand out consecutive new IDs, reserving a new block in the
+        database only when the current one runs out.
+
+        Args:
+            count (int): How many IDs to hand out.
+            at_least (int, optional): The lowest ID the block may start
+                at, e.g. the caller's own next ID.
+
+        Returns:
+            int: The first ID of the block; the rest follow it.
+        """
+        with self._ids_lock:
+            start = max(self._next_free, at_least)
+            if start + count > self._block_end:
+                size = max(count, ID_BLOCK)
+                with self._ids:
+                    self._block_end, = self._ids.execute(
+                        "UPDATE meta SET value = max(value, ?) + ? WHERE key = 'next_id' RETURNING value",
+                        (at_least, size)).fetchone()
+                start = self._block_end - size
+            self._next_free = start + count
+        return start
+
+    def insert_many(self, movies: Iterable[Movie], wait: Optional[bool] = None) -> int:
+        """
+        Insert new movies as part of the same commit.
+
+        Args:
+            movies (Iterable[Movie]): The movies, with IDs from
+                allocate_ids.
+            wait (bool, optional): Overrides the storage's 'wait'.
+
+        Returns:
+            int: The ticket of the write, to pass to sync().
+        """
+        return self._submit([('insert', movie.id, movie.titulo, movie.genero) for movie in movies], wait)
+
+    def update(self, movie: Movie, wait: Optional[bool] = None) -> int:
+        """
+        Replace the title and genre of a stored movie.
+
+        Args:
+            movie (Movie): The movie.
+            wait (bool, optional): Overrides the storage's 'wait'.
+
+        Returns:
+            int: The ticket of the write, to pass to sync().
+        """
+        return self._submit([('update', movie.titulo, movie.genero, movie.id)], wait)
+
+    def seed(self, movies: Iterable[Movie]) -> int:
+        """
+        Store the initial movies of an empty database.
+
+        Movies whose ID is already stored (e.g. another process seeded
+        the same file first) are left alone.
+
+        Args:
+            movies (Iterable[Movie]): The movies.
+
+        Returns:
+            int: The ticket of the write, to pass to sync().
+        """
+        return self._submit([('seed', movie.id, movie.titulo, movie.genero) for movie in movies], None)
+
+    def delete(self, id: int, wait: Optional[bool] = None) -> int:
+        """
+        Delete a movie.
+
+        Args:
+            id (int): The unique ID of the movie.
+            wait (bool, optional): Overrides the storage's 'wait'.
+
+        Returns:
+            int: The ticket of the write, to pass to sync().
+        """
+        return self._submit([('delete', id)], wait)
+
+    def sync(self, ticket: int) -> None:
+        """
+        Block until the write with the given ticket is committed, if
+        the storage was created with 'wait'.
+
+        Args:
+            ticket (int): A ticket returned by insert_many, update,
+                seed or delete.
+
+        Raises:
+            RuntimeError: If the write could not be committed.
+        """
+        if self.wait:
+            with self._cond:
+                self._wait_for(ticket)
+
+    def flush(self) -> None:
+        """
+        Block until every write queued so far is committed.
+
+        Raises:
+            RuntimeError: If the last queued write could not be
+                committed.
+        """
+        with self._cond:
+            self._wait_for(self._queued)
+
+    def close(self) -> None:
+        """Commit pending writes and stop the writer thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._writer.join()
+        with self._ids_lock:
+            if self._next_free < self._block_end:
+                with self._ids:
+                    self._ids.execute(
+                        "UPDATE meta SET value = ? WHERE key = 'next_id' AND value = ?",
+                        (self._next_free, self._block_end))
+            self._ids.close()
+
+    def _connect(self, **kwargs) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, **kwargs)
+        connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    def _submit(self, operations: List[tuple], wait: Optional[bool]) -> int:
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Storage is closed")
+            self._queue.append(operations)
+            self._queued += 1
+            ticket = self._queued
+            self._cond.notify_all()
+            if self.wait if wait is None else wait:
+                self._wait_for(ticket)
+            return ticket
+
+    def _wait_for(self, ticket: int) -> None:
+        while self._committed < ticket:
+            self._cond.wait()
+        for first, last, error in self._lost:
+            if first < ticket <= last:
+                raise RuntimeError("Catalog storage failed") from error
+
+    def _write_loop(self) -> None:
+        connection = self._connect()
+        try:
+            while True:
+                with self._cond:
+                    while not self._queue and not self._closed:
+                        self._cond.wait()
+                    if not self._queue:
+                        return
+                    writes, size = 0, 0
+                    while writes < len(self._queue) and (not size or size + len(self._queue[writes]) <= MAX_BATCH):
+                        size += len(self._queue[writes])
+                        writes += 1
+                    batch = [operation for write in self._queue[:writes] for operation in write]
+                    del self._queue[:writes]
+                error = self._commit(connection, batch)
+                with self._cond:
+                    if error is not None:
+                        self._lost.append((self._committed, self._committed + writes, error))
+                        self.failures += 1
+                    self._committed += writes
+                    self._cond.notify_all()
+        finally:
+            connection.close()
+
+    def _commit(self, connection: sqlite3.Connection, batch: List[tuple]) -> Optional[sqlite3.Error]:
+        delay = RETRY_DELAY
+        for attempt in range(WRITE_RETRIES + 1):
+            try:
+                with connection:
+                    self._apply(connection, batch)
+                return None
+            except sqlite3.OperationalError as error:
+                # NOTE - base ocupada o bloqueada: la transaccion ya se
+                # deshizo, se puede volver a aplicar el lote entero
+                if attempt == WRITE_RETRIES:
+                    return error
+                time.sleep(delay)
+                delay *= 2
+            except sqlite3.Error as error:
+                return error
+
+    @staticmethod
+    def _apply(connection: sqlite3.Connection, batch: List[tuple]) -> None:
+        next_id = 0
+        for operation in batch:
+            if operation[0] == 'insert':
+                connection.execute("INSERT INTO peliculas (id, titulo, genero) VALUES (?, ?, ?)", operation[1:])
+            elif operation[0] == 'seed':
+                connection.execute(
+                    "INSERT OR IGNORE INTO peliculas (id, titulo, genero) VALUES (?, ?, ?)", operation[1:])
+                next_id = max(next_id, operation[1] + 1)
+            elif operation[0] == 'update':
+                connection.execute("UPDATE peliculas SET titulo = ?, genero = ? WHERE id = ?", operation[1:])
+            else:
+                connection.execute("DELETE FROM peliculas WHERE id = ?", operation[1:])
+        if next_id:
+            connection.execute(
+                "UPDATE meta SET value = max(value, ?) WHERE key = 'next_id'", (next_id,))
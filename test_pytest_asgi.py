@@ -0,0 +1,116 @@
+import asyncio
+import httpx
+import pytest
+import proximo_feriado
+import main
+from asgi import AsyncHolidaySource, create_asgi_app
+from rate_limit import MemoryBackend
+from test_pytest_main import FERIADOS
+
+
+@pytest.fixture
+def upstream():
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        return httpx.Response(200, json=FERIADOS)
+    return calls, httpx.MockTransport(handler)
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(proximo_feriado, 'holiday_cache', proximo_feriado.HolidayCache())
+
+@pytest.fixture(autouse=True)
+def rate_limits(monkeypatch):
+    monkeypatch.setattr(main.rate_limiter, 'backend', MemoryBackend())
+
+def request_all(source, paths):
+    async def run():
+        transport = httpx.ASGITransport(app=create_asgi_app(source=source))
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            return await asyncio.gather(*(client.get(path) for path in paths))
+    return asyncio.run(run())
+
+def test_async_holiday_route(upstream, monkeypatch):
+    monkeypatch.setattr(main.rate_limiter, 'enabled', False)
+    calls, transport = upstream
+    source = AsyncHolidaySource(httpx.AsyncClient(transport=transport))
+    paths = ['/peliculas/holiday_type?genre=Drama&h_type=trasladable'] * 20
+    for response in request_all(source, paths):
+        assert response.status_code == 200
+        data = response.json()
+        assert data['pelicula']['genero'] == 'Drama'
+        assert data['feriado']['tipo'] == 'trasladable'
+    # Todas las requests concurrentes comparten una sola descarga por año
+    assert len(calls) == len(set(calls))
+
+def test_async_holiday_missing_genre(upstream):
+    source = AsyncHolidaySource(httpx.AsyncClient(transport=upstream[1]))
+    response, = request_all(source, ['/peliculas/holiday'])
+    assert response.status_code == 404
+    assert response.json() == {'error': 'Missing parameters genre'}
+
+def test_async_holiday_batch(upstream):
+    calls, transport = upstream
+    source = AsyncHolidaySource(httpx.AsyncClient(transport=transport))
+    response, = request_all(source, ['/peliculas/holiday_batch?genres=Drama,Crimen&h_types=inamovible,trasladable'])
+    assert response.status_code == 200
+    data = response.json()
+    assert data['feriados']['trasladable']['tipo'] == 'trasladable'
+    assert data['peliculas']['Crimen']['inamovible']['genero'] == 'Crimen'
+    assert len(calls) == len(set(calls))
+
+def test_async_holiday_batch_repeated_params(upstream):
+    source = AsyncHolidaySource(httpx.AsyncClient(transport=upstream[1]))
+    path = '/peliculas/holiday_batch?genres=Drama&genres=Crimen&h_types=inamovible&h_types=trasladable'
+    response, = request_all(source, [path])
+    assert response.status_code == 200
+    data = response.json()
+    assert set(data['feriados']) == {'inamovible', 'trasladable'}
+    assert set(data['peliculas']) == {'Drama', 'Crimen'}
+
+def test_async_holiday_calendar(upstream):
+    source = AsyncHolidaySource(httpx.AsyncClient(transport=upstream[1]))
+    response, invalid = request_all(source, ['/feriados?from=2025-12-01&to=2026-01-31', '/feriados?n=0'])
+    assert response.status_code == 200
+    assert [dia['fecha'] for dia in response.json()['feriados']] == ['2025-12-08', '2025-12-25', '2026-01-01']
+    assert invalid.status_code == 400
+
+def test_other_routes_are_served_by_flask(upstream):
+    source = AsyncHolidaySource(httpx.AsyncClient(transport=upstream[1]))
+    response, = request_all(source, ['/peliculas/3'])
+    assert response.status_code == 200
+    assert response.json()['titulo'] == 'Interstellar'
+
+def test_async_holiday_rate_limit(upstream):
+    source = AsyncHolidaySource(httpx.AsyncClient(transport=upstream[1]))
+    burst = main.RATE_LIMIT_RULES['film_for_holiday'].burst
+    responses = request_all(source, ['/peliculas/holiday?genre=Drama'] * (burst + 1))
+    assert sorted(response.status_code for response in responses) == [200] * burst + [429]
+
+def test_async_holiday_concurrency_limit(upstream, monkeypatch):
+    source = AsyncHolidaySource(httpx.AsyncClient(transport=upstream[1]))
+    monkeypatch.setattr(main.admission, 'max_concurrent', main.admission.in_flight)
+    response, = request_all(source, ['/peliculas/holiday?genre=Drama'])
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    monkeypatch.setattr(main.admission, 'max_concurrent', main.MAX_CONCURRENT_REQUESTS)
+    response, = request_all(source, ['/peliculas/holiday?genre=Drama'])
+    assert response.status_code == 200
+    assert main.admission.in_flight == 0
+
+def test_async_holiday_upstream_and_internal_errors(monkeypatch, caplog):
+    def handler(request):
+        return httpx.Response(502)
+    source = AsyncHolidaySource(httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    response, = request_all(source, ['/peliculas/holiday?genre=Drama'])
+    assert response.status_code == 503
+
+    # Un bug no se disfraza de nolaborables caido
+    def boom(genre):
+        raise KeyError(genre)
+    monkeypatch.setattr(main.peliculas, 'random_by_genre', boom)
+    response, = request_all(source, ['/peliculas/holiday?genre=Drama'])
+    assert response.status_code == 500
+    assert 'KeyError' in caplog.text
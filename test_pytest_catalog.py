@@ -0,0 +1,132 @@
+import threading
+import pytest
+from catalog import MovieCatalog
+from movie import Movie
+
+
+@pytest.fixture
+def catalog():
+    return MovieCatalog([
+        {'id': 1, 'titulo': 'Indiana Jones', 'genero': 'Acción'},
+        {'id': 2, 'titulo': 'Star Wars', 'genero': 'Acción'},
+        {'id': 3, 'titulo': 'Interstellar', 'genero': 'Ciencia ficción'},
+    ])
+
+def test_get_by_id(catalog):
+    assert catalog.get(2).titulo == 'Star Wars'
+    assert catalog.get(99) is None
+
+def test_remove_after_previous_delete(catalog):
+    # Antes, borrar por posicion eliminaba la pelicula equivocada
+    assert catalog.remove(1).id == 1
+    assert catalog.remove(3).titulo == 'Interstellar'
+    assert [movie.id for movie in catalog] == [2]
+
+def test_update_keeps_id(catalog):
+    catalog.remove(1)
+    updated = catalog.update(2, 'Nuevo título', 'Comedia')
+    assert updated == Movie(2, 'Nuevo título', 'Comedia')
+    assert catalog.update(1, 'x', 'y') is None
+
+def test_ids_are_not_reused(catalog):
+    catalog.remove(3)
+    assert catalog.add('Inception', 'Ciencia ficción').id == 4
+    assert catalog.next_id() == 5
+
+def test_invalid_fields_leave_catalog_untouched(catalog):
+    version = catalog.version()
+    with pytest.raises(TypeError):
+        catalog.add(5, 'Drama')
+    with pytest.raises(TypeError):
+        catalog.add_many([('Ok', 'Drama'), ('Mal', None)])
+    with pytest.raises(TypeError):
+        catalog.update(1, 'Indiana Jones', 5)
+    assert catalog.version() == version
+    assert [movie.id for movie in catalog] == [1, 2, 3]
+    assert catalog.get(1) == Movie(1, 'Indiana Jones', 'Acción')
+    assert catalog.search_title('ok') == []
+
+def test_by_genre_is_case_insensitive(catalog):
+    assert [movie.id for movie in catalog.by_genre('ACCIÓN')] == [1, 2]
+    assert catalog.by_genre('Drama') == []
+
+def test_by_genre_pages(catalog, monkeypatch):
+    import catalog as catalog_module
+    monkeypatch.setattr(catalog_module, 'GENRE_CHUNK', 2)
+    for n in range(5):
+        catalog.add(f'Accion {n}', 'Acción')
+    ids = [movie.id for movie in catalog.by_genre('acción')]
+    assert [movie.id for movie in catalog.by_genre('acción', after_id=ids[1], limit=2)] == ids[2:4]
+    assert [movie.id for movie in catalog.iter_by_genre('acción', after_id=ids[0])] == ids[1:]
+    assert catalog.count_by_genre('acción') == len(ids)
+    assert catalog.count_by_genre('acción', up_to_id=ids[2]) == 3
+    assert catalog.count_by_genre('Drama') == 0
+
+def test_search_title_pages(catalog):
+    ids = [movie.id for movie in catalog.search_title('a')]
+    assert [movie.id for movie in catalog.search_title('a', limit=1, after_id=ids[0])] == ids[1:2]
+    assert catalog.count_title_matches('a', up_to_id=ids[1]) == 2
+    assert catalog.count_title_matches('zzz') == 0
+
+def test_iter_title_matches_in_chunks(catalog, monkeypatch):
+    import catalog as catalog_module
+    monkeypatch.setattr(catalog_module, 'TITLE_CHUNK', 2)
+    for n in range(5):
+        catalog.add(f'Star Trek {n}', 'Ciencia ficción')
+    ids = [movie.id for movie in catalog.search_title('star')]
+    assert [movie.id for movie in catalog.iter_title_matches('STAR')] == ids
+    assert [movie.id for movie in catalog.iter_title_matches('star', after_id=ids[2])] == ids[3:]
+
+def test_genre_index_follows_writes(catalog):
+    catalog.add('Inception', 'Ciencia ficción')
+    catalog.update(1, 'Indiana Jones', 'Ciencia ficción')
+    catalog.remove(3)
+    assert [movie.id for movie in catalog.by_genre('ciencia ficción')] == [1, 4]
+    assert [movie.id for movie in catalog.by_genre('acción')] == [2]
+    assert catalog.random_by_genre('acción').id == 2
+    assert catalog.random_by_genre('Drama') is None
+
+def test_iter_from_skips_removed_movies(catalog):
+    catalog.add('Inception', 'Ciencia ficción')
+    catalog.remove(2)
+    assert [movie.id for movie in catalog.iter_from(1)] == [3, 4]
+    catalog.remove(3)
+    catalog.remove(4)
+    assert [movie.id for movie in catalog.iter_from()] == [1]
+
+def test_concurrent_writes_and_reads(catalog):
+    errors = []
+
+    def writer(n):
+        for i in range(200):
+            movie = catalog.add(f'Pelicula {n}-{i}', f'Genero {n}-{i}')
+            catalog.update(movie.id, f'Titulo {i}', f'Genero {i}')
+
+    def reader():
+        for _ in range(200):
+            for movie in catalog.all() + catalog.search_title('titulo'):
+                # Un registro nunca queda a medio actualizar
+                if movie.titulo.startswith('Titulo') and \
+                        movie.titulo.split()[-1] != movie.genero.split()[-1]:
+                    errors.append(movie)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(8)]
+    threads += [threading.Thread(target=reader) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    ids = [movie.id for movie in catalog.all()]
+    assert len(ids) == len(set(ids)) == 3 + 8 * 200
+    assert sorted(ids) == ids
+    assert not errors
+
+def test_sample_follows_writes(catalog):
+    catalog.add('Inception', 'Ciencia ficción')
+    catalog.remove(2)
+    assert sorted(movie.id for movie in catalog.sample(10)) == [1, 3, 4]
+    assert sorted(movie.id for movie in catalog.sample(10, 'CIENCIA FICCIÓN')) == [3, 4]
+    catalog.update(3, 'Interstellar', 'Drama')
+    assert [movie.id for movie in catalog.sample(10, 'drama')] == [3]
+    assert catalog.sample(1, 'Western') == []
@@ -0,0 +1,40 @@
+import pytest
+import requests
+import proximo_feriado
+from fake_nolaborables import FakeNolaborables, load_recorded
+from holiday_client import HolidayClient
+
+
+@pytest.fixture
+def fake():
+    with FakeNolaborables() as server:
+        yield server
+
+def test_serves_recorded_holidays(fake):
+    client = HolidayClient(retries=0)
+    assert client.get_json(fake.url(2025)) == load_recorded(2025)
+    # Un año sin grabacion usa el grabado mas cercano
+    assert client.get_json(fake.url(2030)) == load_recorded(2026)
+    assert fake.requests == 2
+
+def test_unknown_path_is_404(fake):
+    assert requests.get(f'{fake.base_url}/api/v2/otra_cosa').status_code == 404
+
+def test_injected_errors(fake):
+    fake.error_rate = 1.0
+    client = HolidayClient(retries=0)
+    with pytest.raises(requests.RequestException, match='503'):
+        client.get_json(fake.url(2025))
+    assert client.stats.snapshot()['errors'] == 1
+
+def test_injected_timeouts(fake):
+    fake.timeout_rate = 1.0
+    fake.hang = 1.0
+    client = HolidayClient(read_timeout=0.2, retries=0)
+    with pytest.raises(requests.RequestException, match='Read timed out'):
+        client.get_json(fake.url(2025))
+
+def test_get_url_follows_base_url(fake, monkeypatch):
+    monkeypatch.setattr(proximo_feriado, 'NOLABORABLES_BASE_URL', fake.base_url + '/')
+    assert proximo_feriado.get_url(2026) == fake.url(2026)
+    assert proximo_feriado.download_holidays(2026) == load_recorded(2026)
@@ -0,0 +1,41 @@
+import json
+import pytest
+from flask import Flask
+import fast_json
+from fast_json import FastJSONProvider, RecordFragments
+from movie import Movie
+
+MOVIE = Movie(7, 'El secreto de sus ojos', 'Drama')
+
+
+@pytest.fixture(params=['orjson', 'stdlib'])
+def provider(request, monkeypatch):
+    if request.param == 'stdlib':
+        monkeypatch.setattr(fast_json, 'orjson', None)
+    elif fast_json.orjson is None:
+        pytest.skip('orjson no esta instalado')
+    return FastJSONProvider(Flask(__name__))
+
+def test_provider_round_trip(provider):
+    encoded = provider.dumps_bytes(MOVIE)
+    assert b' ' not in encoded.replace(b'El secreto de sus ojos', b'')
+    assert provider.loads(encoded) == MOVIE.to_dict()
+    assert json.loads(provider.dumps({'pelicula': MOVIE})) == {'pelicula': MOVIE.to_dict()}
+
+def test_fragments_encode_and_renumber(provider):
+    fragments = RecordFragments(provider.dumps_bytes)
+    assert json.loads(fragments.encode(MOVIE)) == MOVIE.to_dict()
+    assert json.loads(fragments.encode(MOVIE, 1)) == dict(MOVIE.to_dict(), id=1)
+    assert json.loads(fragments.encode(MOVIE, rank=3)) == dict(MOVIE.to_dict(), rank=3)
+    # El fragmento se reutiliza mientras el registro sea el mismo
+    assert fragments.encode(MOVIE) is fragments.encode(MOVIE)
+
+def test_fragments_follow_replaced_records(provider):
+    fragments = RecordFragments(provider.dumps_bytes)
+    fragments.encode(MOVIE)
+    updated = Movie(7, 'Relatos salvajes', 'Drama')
+    # Un registro nuevo con el mismo id no devuelve el JSON viejo
+    assert json.loads(fragments.encode(updated)) == updated.to_dict()
+
+    fragments.forget([(updated, None)])
+    assert fragments._fragments == {}
@@ -0,0 +1,56 @@
+import pytest
+import requests
+import requests_mock
+from holiday_client import CircuitBreaker, CircuitOpenError, HolidayClient
+
+URL = 'https://nolaborables.com.ar/api/v2/feriados/2025'
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def client(clock):
+    return HolidayClient(breaker=CircuitBreaker(threshold=2, cooldown=30, clock=clock))
+
+def test_get_json_records_latency(client):
+    with requests_mock.Mocker() as m:
+        m.get(URL, json=[{'motivo': 'Año Nuevo'}])
+        assert client.get_json(URL) == [{'motivo': 'Año Nuevo'}]
+    stats = client.stats.snapshot()
+    assert stats['calls'] == 1
+    assert stats['errors'] == 0
+    assert stats['last_seconds'] is not None
+
+def test_breaker_opens_and_fails_fast(client, clock):
+    with requests_mock.Mocker() as m:
+        m.get(URL, status_code=500)
+        for _ in range(2):
+            with pytest.raises(requests.exceptions.HTTPError):
+                client.get_json(URL)
+        with pytest.raises(CircuitOpenError):
+            client.get_json(URL)
+        assert m.call_count == 2
+    assert client.stats.snapshot()['rejected'] == 1
+    assert client.breaker.state == 'open'
+
+def test_breaker_half_open_trial_closes_it(client, clock):
+    with requests_mock.Mocker() as m:
+        m.get(URL, status_code=503)
+        for _ in range(2):
+            with pytest.raises(requests.exceptions.HTTPError):
+                client.get_json(URL)
+        clock.now = 31
+        assert client.breaker.state == 'half-open'
+        m.get(URL, json=[])
+        assert client.get_json(URL) == []
+    assert client.breaker.state == 'closed'
@@ -1,7 +1,37 @@
 # test.py
 
 import pytest
+import requests
+from datetime import date
+import proximo_feriado
+import main
 from main import app
+from rate_limit import MemoryBackend, Rule
+
+FERIADOS = [
+    {'motivo': 'Año Nuevo', 'tipo': 'inamovible', 'dia': 1, 'mes': 1, 'id': 'año-nuevo'},
+    {'motivo': 'Día de la Memoria', 'tipo': 'inamovible', 'dia': 24, 'mes': 3, 'id': 'memoria'},
+    {'motivo': 'Paso a la Inmortalidad del General Güemes', 'tipo': 'trasladable', 'dia': 17, 'mes': 6, 'id': 'guemes'},
+    {'motivo': 'Paso a la Inmortalidad del General San Martín', 'tipo': 'trasladable', 'dia': 17, 'mes': 8, 'id': 'san-martin'},
+    {'motivo': 'Día del Respeto a la Diversidad Cultural', 'tipo': 'trasladable', 'dia': 12, 'mes': 10, 'id': 'diversidad'},
+    {'motivo': 'Día de la Soberanía Nacional', 'tipo': 'trasladable', 'dia': 20, 'mes': 11, 'id': 'soberania'},
+    {'motivo': 'Inmaculada Concepción de María', 'tipo': 'inamovible', 'dia': 8, 'mes': 12, 'id': 'inmaculada-maria'},
+    {'motivo': 'Navidad', 'tipo': 'inamovible', 'dia': 25, 'mes': 12, 'id': 'navidad'},
+]
+
+@pytest.fixture(autouse=True)
+def fake_nolaborables(monkeypatch):
+    # Reemplazamos la API de nolaborables por una local
+    cache = proximo_feriado.HolidayCache(fetch=lambda year: FERIADOS)
+    monkeypatch.setattr(proximo_feriado, 'holiday_cache', cache)
+    return cache
+
+@pytest.fixture(autouse=True)
+def rate_limits(monkeypatch):
+    # Cada test arranca con los buckets llenos
+    backend = MemoryBackend()
+    monkeypatch.setattr(main.rate_limiter, 'backend', backend)
+    return backend
 
 @pytest.fixture
 def client():
@@ -42,6 +72,13 @@ def test_actualizar_detalle_pelicula(client):
     data = response.get_json()
     assert data['titulo'] == 'Nuevo título'
 
+@pytest.mark.parametrize('cuerpo', [{'titulo': 5, 'genero': 'x'}, {'titulo': 'x'}, ['x', 'y']])
+def test_agregar_o_actualizar_con_cuerpo_invalido(client, cuerpo):
+    etag = client.get('/peliculas').headers['ETag']
+    assert client.post('/peliculas', json=cuerpo).status_code == 400
+    assert client.put('/peliculas/1', json=cuerpo).status_code == 400
+    assert client.get('/peliculas').headers['ETag'] == etag
+
 def test_eliminar_pelicula(client):
     response = client.delete('/peliculas/1')
     assert response.status_code == 200
@@ -104,3 +141,319 @@ def test_film_for_holiday_type(client):
         data = response.get_json()
         assert "trasladable" in data['feriado']['tipo']
         assert index in data['pelicula']['genero']
+
+def test_film_for_holiday_batch(client, fake_nolaborables):
+    fetch = fake_nolaborables.fetch
+    años = []
+    fake_nolaborables.fetch = lambda year: años.append(year) or fetch(year)
+    response = client.get('/peliculas/holiday_batch?genres=Drama,Acción,Inexistente&h_types=inamovible,trasladable'
+                          '&h_types=puente')
+    assert response.status_code == 200
+    data = response.get_json()
+    # Cada tipo de feriado coincide con el de la ruta individual
+    for tipo in ('inamovible', 'trasladable', 'puente'):
+        individual = client.get(f'/peliculas/holiday_type?genre=Drama&h_type={tipo}').get_json()
+        assert data['feriados'][tipo] == individual['feriado']
+    assert 'de tipo puente' in data['feriados']['puente']
+    # Una pelicula por genero y tipo, distintas dentro de cada genero
+    assert set(data['peliculas']) == {'Drama', 'Acción', 'Inexistente'}
+    accion = data['peliculas']['Acción']
+    assert all(pelicula['genero'] == 'Acción' for pelicula in accion.values())
+    assert len({pelicula['id'] for pelicula in accion.values()}) == 3
+    assert data['peliculas']['Inexistente'] == {'inamovible': None, 'trasladable': None, 'puente': None}
+    # Los feriados de cada año se descargan una sola vez
+    assert len(años) == len(set(años))
+
+def test_film_for_holiday_batch_parametros_invalidos(client):
+    response = client.get('/peliculas/holiday_batch?genres=Drama')
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Missing parameters h_types'}
+    generos = ','.join(f'Genero {n}' for n in range(main.MAX_BATCH_GENRES + 1))
+    response = client.get(f'/peliculas/holiday_batch?genres={generos}&h_types=inamovible')
+    assert response.status_code == 400
+
+def test_calendario_de_feriados(client):
+    proximos = client.get('/feriados?n=3').get_json()['feriados']
+    assert len(proximos) == 3
+    # El primero es el mismo que devuelve la ruta de un solo feriado
+    feriado = client.get('/peliculas/holiday?genre=Drama').get_json()['feriado']
+    assert proximos[0]['motivo'] == feriado['motivo']
+    assert all(set(dia) >= {'fecha', 'dia_semana', 'nombre_mes', 'tipo'} for dia in proximos)
+    assert [dia['fecha'] for dia in proximos] == sorted(dia['fecha'] for dia in proximos)
+
+    rango = client.get('/feriados?from=2025-12-01&to=2026-03-31&h_type=inamovible').get_json()['feriados']
+    assert [(dia['fecha'], dia['dia_semana']) for dia in rango] == [
+        ('2025-12-08', 'Lunes'), ('2025-12-25', 'Jueves'), ('2026-01-01', 'Jueves'), ('2026-03-24', 'Martes')]
+
+@pytest.mark.parametrize('parametros', ['n=0', 'n=1000', 'n=abc', 'n=²', 'from=2025-01-01', 'from=2025-13-01&to=2025-12-31',
+                                        'from=2025-12-31&to=2025-01-01', 'from=2020-01-01&to=2025-01-01',
+                                        'from=0001-01-01&to=0003-12-31',
+                                        f'from={date.today().year + 2}-01-01&to={date.today().year + 2}-12-31'])
+def test_calendario_de_feriados_parametros_invalidos(client, parametros):
+    response = client.get(f'/feriados?{parametros}')
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+@pytest.mark.parametrize('ruta', ['/peliculas/holiday?genre=Drama', '/peliculas/holiday_type?genre=Drama&h_type=puente',
+                                  '/peliculas/holiday_batch?genres=Drama&h_types=inamovible', '/feriados?n=3'])
+def test_feriados_sin_nolaborables(client, monkeypatch, ruta):
+    def caido(year):
+        raise requests.ConnectionError('nolaborables caido')
+
+    monkeypatch.setattr(proximo_feriado, 'holiday_cache', proximo_feriado.HolidayCache(fetch=caido))
+    response = client.get(ruta)
+    assert response.status_code == 503
+    assert response.get_json() == {'error': 'Holiday service unavailable'}
+
+def test_feriados_sin_el_año_que_viene(client, monkeypatch):
+    # Sin feriados "puente" este año hace falta el siguiente, que falla
+    def solo_este_año(year):
+        if year > date.today().year:
+            raise requests.ConnectionError('nolaborables caido')
+        return FERIADOS
+
+    monkeypatch.setattr(proximo_feriado, 'holiday_cache', proximo_feriado.HolidayCache(fetch=solo_este_año))
+    response = client.get('/peliculas/holiday_type?genre=Drama&h_type=puente')
+    assert response.status_code == 503
+    assert response.get_json() == {'error': 'Holiday service unavailable'}
+
+def test_paginar_peliculas(client):
+    completa = client.get('/peliculas').get_json()
+    response = client.get('/peliculas?limit=5')
+    assert response.get_json() == completa[:5]
+    cursor = response.headers['X-Next-Cursor']
+    assert cursor == str(completa[4]['id'])
+    response = client.get(f'/peliculas?limit=5&after_id={cursor}')
+    assert response.get_json() == completa[5:10]
+
+def test_paginar_parametros_invalidos(client):
+    assert client.get('/peliculas?limit=0').status_code == 400
+    assert client.get('/peliculas?after_id=abc').status_code == 400
+    # '²' pasa isdigit() pero int() lo rechaza
+    assert client.get('/peliculas?limit=²').status_code == 400
+    assert client.get('/peliculas?after_id=²').status_code == 400
+    assert client.get('/peliculas?stream=xml').status_code == 400
+
+def test_paginar_busqueda_mantiene_numeracion(client):
+    completa = client.get('/peliculas/get_movie_by_title_keyword?kw=Th').get_json()
+    response = client.get('/peliculas/get_movie_by_title_keyword?kw=Th&limit=2')
+    primera = response.get_json()
+    cursor = response.headers['X-Next-Cursor']
+    resto = client.get(f'/peliculas/get_movie_by_title_keyword?kw=Th&after_id={cursor}').get_json()
+    assert primera + resto == completa
+
+def test_paginar_genero_mantiene_numeracion(client):
+    completa = client.get('/peliculas/get_movie_by_genre?genre=Acción').get_json()
+    response = client.get('/peliculas/get_movie_by_genre?genre=Acción&limit=2')
+    primera = response.get_json()
+    cursor = response.headers['X-Next-Cursor']
+    resto = client.get(f'/peliculas/get_movie_by_genre?genre=Acción&after_id={cursor}&stream=json').get_json()
+    assert primera + resto == completa
+    # Despues de la ultima pagina la respuesta esta vacia, no es 404
+    response = client.get('/peliculas/get_movie_by_genre?genre=Acción&after_id=1000000')
+    assert response.status_code == 200
+    assert response.get_json() == []
+
+def test_stream_ndjson(client):
+    import json
+    response = client.get('/peliculas?stream=ndjson')
+    assert response.mimetype == 'application/x-ndjson'
+    lines = response.get_data(as_text=True).splitlines()
+    assert [json.loads(line) for line in lines] == client.get('/peliculas').get_json()
+    response = client.get('/peliculas/get_movie_by_genre?genre=Drama&stream=json')
+    assert response.get_json() == client.get('/peliculas/get_movie_by_genre?genre=Drama').get_json()
+    response = client.get('/peliculas/get_movie_by_title_keyword?kw=th&stream=ndjson')
+    lines = response.get_data(as_text=True).splitlines()
+    assert [json.loads(line) for line in lines] == client.get('/peliculas/get_movie_by_title_keyword?kw=th').get_json()
+    assert client.get('/peliculas/get_movie_by_title_keyword?kw=zzzz&stream=json').status_code == 404
+
+def test_importar_ndjson(client):
+    body = '\n'.join([
+        '{"titulo": "Alien", "genero": "Ciencia ficción"}',
+        '{"titulo": "", "genero": "Terror"}',
+        'no es json',
+        '{"titulo": "Amélie", "genero": "Comedia", "id": 1}',
+    ])
+    response = client.post('/peliculas/bulk', data=body, content_type='application/x-ndjson')
+    assert response.status_code == 201
+    data = response.get_json()
+    assert data['imported'] == 2
+    assert [error['line'] for error in data['errors']] == [2, 3]
+    assert client.get('/peliculas/get_movie_by_title_keyword?kw=amélie').status_code == 200
+
+@pytest.mark.parametrize('content_type, cabecera', [('application/x-ndjson', b''), ('text/csv', b'titulo,genero\n')])
+def test_importar_utf8_invalido(client, content_type, cabecera):
+    antes = {pelicula['id'] for pelicula in client.get('/peliculas').get_json()}
+    fila = b'{"titulo": "Pelicula", "genero": "Drama"}\n' if content_type != 'text/csv' else b'Pelicula,Drama\n'
+    body = cabecera + fila * 1000 + b'\xff\n' + fila
+    response = client.post('/peliculas/bulk', data=body, content_type=content_type)
+    assert response.status_code == 400
+    data = response.get_json()
+    assert data['error'] == 'Body is not valid UTF-8'
+    # Lo que ya se importo se informa
+    assert 0 < data['imported'] <= 1000
+    nuevas = {pelicula['id'] for pelicula in client.get('/peliculas').get_json()} - antes
+    assert len(nuevas) == data['imported']
+    # El catalogo es compartido entre tests: sacamos lo importado
+    for id in nuevas:
+        client.delete(f'/peliculas/{id}')
+
+def test_importar_y_exportar_csv(client):
+    body = 'titulo,genero\n"Crouching Tiger, Hidden Dragon",Acción\nUp,Animación\n'
+    response = client.post('/peliculas/bulk', data=body.encode(), content_type='text/csv')
+    assert response.get_json()['imported'] == 2
+    export = client.get('/peliculas/export?format=csv').get_data(as_text=True)
+    assert export.splitlines()[0] == 'id,titulo,genero'
+    assert ',"Crouching Tiger, Hidden Dragon",Acción' in export
+    assert client.post('/peliculas/bulk', data='x', content_type='text/plain').status_code == 415
+
+def test_exportar_ndjson(client):
+    import json
+    lines = client.get('/peliculas/export').get_data(as_text=True).splitlines()
+    assert [json.loads(line) for line in lines] == client.get('/peliculas').get_json()
+
+def test_obtener_varias_peliculas(client):
+    response = client.post('/peliculas/batch', json={'ids': [3, 999, 3, 4]})
+    assert response.status_code == 200
+    data = response.get_json()
+    assert [movie['id'] for movie in data['found']] == [3, 4]
+    assert data['missing'] == [999]
+    data = client.get('/peliculas/batch?ids=4,3').get_json()
+    assert [movie['titulo'] for movie in data['found']] == ['Jurassic Park', 'Interstellar']
+    assert client.get('/peliculas/batch?ids=1,a').status_code == 400
+    assert client.get('/peliculas/batch?ids=1,²').status_code == 400
+    # Ids fuera de rango no llegan al encoder JSON
+    assert client.get('/peliculas/batch?ids=99999999999999999999999').status_code == 400
+    assert client.post('/peliculas/batch', data='{"ids": [%d]}' % 2 ** 64,
+                       content_type='application/json').status_code == 400
+    assert client.post('/peliculas/batch', json={'ids': [0]}).status_code == 400
+    assert client.post('/peliculas/batch', json={'ids': '1'}).status_code == 400
+
+def test_etag_y_304(client):
+    response = client.get('/peliculas/get_movie_by_genre?genre=Drama')
+    etag = response.headers['ETag']
+    assert 'max-age' in response.headers['Cache-Control']
+    response = client.get('/peliculas/get_movie_by_genre?genre=Drama',
+                          headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.get_data() == b''
+    # If-None-Match compara de forma debil: un proxy que debilita la etiqueta igual recibe 304
+    response = client.get('/peliculas/get_movie_by_genre?genre=Drama',
+                          headers={'If-None-Match': 'W/' + etag})
+    assert response.status_code == 304
+    # Cualquier escritura cambia la version del catalogo
+    client.post('/peliculas', json={'titulo': 'Otra', 'genero': 'Drama'})
+    response = client.get('/peliculas/get_movie_by_genre?genre=Drama',
+                          headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+def test_etag_no_se_agrega_a_errores(client):
+    response = client.get('/peliculas/999')
+    assert response.status_code == 404
+    assert 'ETag' not in response.headers
+
+def test_cache_de_busquedas(client):
+    client.get('/peliculas/get_movie_by_genre?genre=Fantasía')
+    client.get('/peliculas/get_movie_by_title_keyword?kw=lord')
+    antes = client.get('/peliculas/cache_stats').get_json()
+    primera = client.get('/peliculas/get_movie_by_genre?genre=FANTASÍA').get_json()
+    despues = client.get('/peliculas/cache_stats').get_json()
+    assert despues['hits'] == antes['hits'] + 1
+
+    # Agregar una pelicula de Fantasía sin "lord" solo invalida la busqueda por genero
+    client.post('/peliculas', json={'titulo': 'Willow', 'genero': 'Fantasía'})
+    segunda = client.get('/peliculas/get_movie_by_genre?genre=Fantasía').get_json()
+    assert len(segunda) == len(primera) + 1
+    client.get('/peliculas/get_movie_by_title_keyword?kw=lord')
+    final = client.get('/peliculas/cache_stats').get_json()
+    assert final['hits'] == despues['hits'] + 1
+    assert final['invalidations'] == despues['invalidations'] + 1
+
+def test_cache_de_busquedas_no_sirve_datos_viejos(client, monkeypatch):
+    client.get('/peliculas/get_movie_by_genre?genre=Drama')
+    clave = next(key for key in main.search_cache._entries if key[:2] == ('genre', 'drama'))
+    # Un listener que corre antes de la invalidacion ve la version nueva
+    # pero la cache todavia tiene la respuesta vieja: tiene que ser un miss
+    vistas = []
+    def antes_de_invalidar(changes):
+        vistas.append(main.search_cache.get(clave))
+    monkeypatch.setattr(main.peliculas, '_listeners', [antes_de_invalidar] + main.peliculas._listeners)
+    client.post('/peliculas', json={'titulo': 'Otra', 'genero': 'Comedia'})
+    assert vistas == [None]
+    antes = client.get('/peliculas/cache_stats').get_json()
+    client.get('/peliculas/get_movie_by_genre?genre=Drama')
+    despues = client.get('/peliculas/cache_stats').get_json()
+    assert despues['hits'] == antes['hits'] + 1
+
+def test_busqueda_con_ids_reales_y_rank(client):
+    completa = client.get('/peliculas').get_json()
+    response = client.get('/peliculas/get_movie_by_genre?genre=Acción&view=record&rank=1')
+    data = response.get_json()
+    esperadas = [pelicula for pelicula in completa if pelicula['genero'] == 'Acción']
+    assert [pelicula['id'] for pelicula in data] == [pelicula['id'] for pelicula in esperadas]
+    assert [pelicula['rank'] for pelicula in data] == list(range(1, len(esperadas) + 1))
+
+    # El id real sirve para pedir la pelicula despues
+    data = client.get('/peliculas/get_movie_by_title_keyword?kw=Th&view=record').get_json()
+    assert 'rank' not in data[0]
+    detalle = client.get(f"/peliculas/{data[0]['id']}").get_json()
+    assert detalle == data[0]
+
+    # Por defecto se mantiene la numeracion por posicion
+    data = client.get('/peliculas/get_movie_by_title_keyword?kw=Th&rank=true').get_json()
+    assert [pelicula['id'] for pelicula in data] == [pelicula['rank'] for pelicula in data]
+
+def test_busqueda_vista_invalida(client):
+    assert client.get('/peliculas/get_movie_by_genre?genre=Drama&view=xml').status_code == 400
+    assert client.get('/peliculas/get_movie_by_title_keyword?kw=Th&rank=si').status_code == 400
+
+def test_random_varias_peliculas(client):
+    data = client.get('/peliculas/random?n=3').get_json()
+    assert len(data) == 3
+    assert len({pelicula['id'] for pelicula in data}) == 3
+    data = client.get('/peliculas/random_by_genre?genre=Acción&n=100').get_json()
+    assert data and all(pelicula['genero'] == 'Acción' for pelicula in data)
+    assert client.get('/peliculas/random?n=0').status_code == 400
+    assert client.get('/peliculas/random?n=5000').status_code == 400
+
+def test_random_ponderado(client):
+    pelicula = client.get('/peliculas').get_json()[0]
+    client.get(f"/peliculas/{pelicula['id']}")
+    data = client.get(f"/peliculas/random_by_genre?genre={pelicula['genero']}&weighted=1").get_json()
+    assert data['genero'] == pelicula['genero']
+    assert client.get('/peliculas/random?weighted=1&n=2').status_code == 200
+    assert client.get('/peliculas/random_by_genre?genre=Western&weighted=1').status_code == 404
+
+def test_rate_limit_por_cliente_y_ruta(client, monkeypatch):
+    monkeypatch.setitem(main.rate_limiter.rules, 'get_movie', Rule(rate=0.001, burst=2))
+    assert client.get('/peliculas/2').status_code == 200
+    assert client.get('/peliculas/3').status_code == 200
+    response = client.get('/peliculas/2')
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) > 0
+    # Otro cliente y otra ruta tienen sus propios buckets
+    assert client.get('/peliculas/2', environ_base={'REMOTE_ADDR': '10.0.0.2'}).status_code == 200
+    assert client.get('/peliculas').status_code == 200
+
+def test_limite_de_concurrencia(client, monkeypatch):
+    monkeypatch.setattr(main.admission, 'max_concurrent', main.admission.in_flight)
+    response = client.get('/peliculas')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    monkeypatch.setattr(main.admission, 'max_concurrent', main.MAX_CONCURRENT_REQUESTS)
+    assert client.get('/peliculas').status_code == 200
+    assert main.admission.in_flight == 0
+
+def test_metricas(client):
+    client.get('/peliculas/holiday_type?genre=Drama&h_type=inamovible')
+    client.get('/peliculas/999999')
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    texto = response.get_data(as_text=True)
+    assert 'peliculas_requests_total{route="get_movie",method="GET",status="404"}' in texto
+    assert 'peliculas_request_duration_seconds_count{route="film_for_holiday_type",method="GET"}' in texto
+    for paso in ('holiday_fetch', 'catalog_lookup', 'json_encode'):
+        assert f'peliculas_span_duration_seconds_count{{route="film_for_holiday_type",span="{paso}"}}' in texto
+    assert 'peliculas_catalog_movies ' in texto
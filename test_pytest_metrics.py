@@ -0,0 +1,24 @@
+from metrics import Registry
+
+
+def test_histogram_y_contador_en_formato_texto():
+    registry = Registry()
+    latency = registry.histogram('demo_seconds', 'Demo latency.', ('route',), buckets=(0.1, 1.0))
+    requests = registry.counter('demo_total', 'Demo requests.', ('route', 'status'))
+    registry.collected('demo_size', 'gauge', 'Demo size.', lambda: [({}, 3)])
+    latency.observe(('a',), 0.05)
+    latency.observe(('a',), 0.5)
+    latency.observe(('a',), 5)
+    requests.inc(('a', '200'))
+    requests.inc(('a', '200'))
+    requests.inc(('b "x"', '404'))
+
+    lines = registry.render().splitlines()
+    assert '# TYPE demo_seconds histogram' in lines
+    assert 'demo_seconds_bucket{route="a",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{route="a",le="1.0"} 2' in lines
+    assert 'demo_seconds_bucket{route="a",le="+Inf"} 3' in lines
+    assert 'demo_seconds_count{route="a"} 3' in lines
+    assert 'demo_total{route="a",status="200"} 2' in lines
+    assert 'demo_total{route="b \\"x\\"",status="404"} 1' in lines
+    assert 'demo_size 3' in lines
@@ -0,0 +1,197 @@
+import threading
+import time
+import pytest
+from datetime import date, datetime
+from proximo_feriado import HolidayCache, HolidayCalendar, HolidayPrefetcher, HolidayTimeline, NextHoliday, day_of_week
+
+
+class FakeUpstream:
+    def __init__(self, delay=0):
+        self.calls = 0
+        self.delay = delay
+
+    def __call__(self, year):
+        self.calls += 1
+        time.sleep(self.delay)
+        return [{'motivo': f'Feriado {year}', 'tipo': 'inamovible', 'dia': 1, 'mes': 1}]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+def test_cache_fetches_each_year_once():
+    upstream = FakeUpstream()
+    cache = HolidayCache(fetch=upstream)
+    assert cache.get(2025).holidays[0]['motivo'] == 'Feriado 2025'
+    cache.get(2025)
+    cache.get(2026)
+    assert upstream.calls == 2
+
+def test_concurrent_misses_share_one_fetch():
+    upstream = FakeUpstream(delay=0.05)
+    cache = HolidayCache(fetch=upstream)
+    threads = [threading.Thread(target=cache.get, args=(2025,)) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert upstream.calls == 1
+
+def test_expired_entry_is_served_while_refreshing():
+    upstream = FakeUpstream(delay=0.05)
+    clock = FakeClock()
+    cache = HolidayCache(fetch=upstream, ttl=10, clock=clock)
+    cache.get(2025)
+    clock.now = 11
+    start = time.monotonic()
+    assert cache.get(2025).holidays[0]['motivo'] == 'Feriado 2025'
+    assert time.monotonic() - start < 0.05
+    time.sleep(0.1)
+    assert upstream.calls == 2
+
+def test_failed_fetch_is_raised_on_miss():
+    def broken(year):
+        raise ConnectionError('nolaborables caido')
+    cache = HolidayCache(fetch=broken)
+    with pytest.raises(ConnectionError):
+        cache.get(2025)
+
+def test_timeline_next_after():
+    timeline = HolidayTimeline([
+        {'motivo': 'Navidad', 'tipo': 'inamovible', 'dia': 25, 'mes': 12},
+        {'motivo': 'Güemes', 'tipo': 'trasladable', 'dia': 17, 'mes': 6},
+        {'motivo': 'Año Nuevo', 'tipo': 'inamovible', 'dia': 1, 'mes': 1},
+    ])
+    assert timeline.next_after(1, 1)['motivo'] == 'Güemes'
+    assert timeline.next_after(6, 16)['motivo'] == 'Güemes'
+    assert timeline.next_after(6, 17, 'INAMOVIBLE')['motivo'] == 'Navidad'
+    assert timeline.next_after(6, 17, 'trasladable') is None
+    assert timeline.next_after(12, 25) is None
+
+def test_next_holiday_rolls_over_to_next_year():
+    cache = HolidayCache(fetch=FakeUpstream())
+    next_holiday = NextHoliday(cache)
+    this_year = next_holiday.year
+    next_holiday.fetch_holidays()
+    assert next_holiday.holiday['motivo'] == f'Feriado {this_year + 1}'
+    assert next_holiday.year == this_year + 1
+    assert not next_holiday.loading
+
+def test_next_holiday_when_next_year_fails():
+    this_year = NextHoliday().year
+
+    def fetch(year):
+        if year > this_year:
+            raise ConnectionError('nolaborables caido')
+        return CALENDARIO
+
+    next_holiday = NextHoliday(HolidayCache(fetch=fetch))
+    # No se confunde con "no hay feriados": el error llega al caller
+    with pytest.raises(ConnectionError):
+        next_holiday.fetch_holidays('puente')
+    assert next_holiday.loading
+
+def test_next_holiday_of_missing_type():
+    next_holiday = NextHoliday(HolidayCache(fetch=FakeUpstream()))
+    next_holiday.fetch_holidays('puente')
+    assert next_holiday.loading
+    assert 'de tipo puente' in next_holiday.holiday
+
+def test_prefetcher_warms_up_current_and_next_year():
+    upstream = FakeUpstream()
+    clock = FakeClock()
+    cache = HolidayCache(fetch=upstream, ttl=100, clock=clock)
+    prefetcher = HolidayPrefetcher(cache, ahead=0.75, now=lambda: datetime(2025, 6, 1))
+    assert prefetcher.warm_up() == 75
+    assert cache.peek(2025)[1] and cache.peek(2026)[1]
+    assert upstream.calls == 2
+
+    # Antes de vencer no descarga, despues de 3/4 del TTL refresca
+    clock.now = 50
+    assert prefetcher.warm_up() == 25
+    assert upstream.calls == 2
+    clock.now = 80
+    prefetcher.warm_up()
+    assert upstream.calls == 4
+    assert cache.age(2025) == 0
+
+def test_prefetcher_rolls_over_at_new_year():
+    upstream = FakeUpstream()
+    now = [datetime(2025, 12, 31, 23, 59, 50)]
+    cache = HolidayCache(fetch=upstream, clock=FakeClock())
+    prefetcher = HolidayPrefetcher(cache, now=lambda: now[0])
+    # Se despierta justo despues de año nuevo
+    assert prefetcher.warm_up() == 11
+    now[0] = datetime(2026, 1, 1, 0, 0, 1)
+    prefetcher.warm_up()
+    assert cache.peek(2027)[0].holidays[0]['motivo'] == 'Feriado 2027'
+    assert upstream.calls == 3
+
+def test_prefetcher_retries_failed_years():
+    def broken(year):
+        raise ConnectionError('nolaborables caido')
+
+    cache = HolidayCache(fetch=broken)
+    prefetcher = HolidayPrefetcher(cache, retry=5, now=lambda: datetime(2025, 6, 1))
+    assert prefetcher.warm_up() == 5
+    assert set(prefetcher.errors) == {2025, 2026}
+    cache.fetch = FakeUpstream()
+    prefetcher.warm_up()
+    assert prefetcher.errors == {}
+
+def test_prefetcher_thread_keeps_cache_warm():
+    upstream = FakeUpstream()
+    cache = HolidayCache(fetch=upstream, ttl=0.04)
+    prefetcher = HolidayPrefetcher(cache).start()
+    try:
+        assert upstream.calls == 2
+        time.sleep(0.2)
+    finally:
+        prefetcher.stop()
+    assert upstream.calls > 2
+
+CALENDARIO = [
+    {'motivo': 'Año Nuevo', 'tipo': 'inamovible', 'dia': 1, 'mes': 1},
+    {'motivo': 'Güemes', 'tipo': 'trasladable', 'dia': 17, 'mes': 6},
+    {'motivo': 'Soberanía', 'tipo': 'trasladable', 'dia': 20, 'mes': 11},
+    {'motivo': 'Navidad', 'tipo': 'inamovible', 'dia': 25, 'mes': 12},
+]
+
+def test_timeline_precomputes_calendar_days():
+    timeline = HolidayTimeline(CALENDARIO, 2025)
+    navidad = timeline.days[-1]
+    assert navidad['fecha'] == '2025-12-25'
+    assert navidad['dia_semana'] == day_of_week(25, 12, 2025) == 'Jueves'
+    assert navidad['nombre_mes'] == 'Diciembre'
+    assert navidad['motivo'] == 'Navidad'
+    # Sin año no hay entradas de calendario
+    assert HolidayTimeline(CALENDARIO).days == []
+
+def test_calendar_upcoming_crosses_year_boundary():
+    calendar = HolidayCalendar(HolidayCache(fetch=lambda year: CALENDARIO))
+    proximos = calendar.upcoming(3, after=date(2025, 11, 20))
+    assert [dia['fecha'] for dia in proximos] == ['2025-12-25', '2026-01-01', '2026-06-17']
+    proximos = calendar.upcoming(2, 'trasladable', after=date(2025, 6, 1))
+    assert [dia['fecha'] for dia in proximos] == ['2025-06-17', '2025-11-20']
+    # No mira mas alla del año que viene
+    assert len(calendar.upcoming(100, after=date(2025, 1, 1))) == 7
+    # Si alcanzan los feriados de este año no descarga el siguiente
+    años = []
+    calendar = HolidayCalendar(HolidayCache(fetch=lambda year: años.append(year) or CALENDARIO))
+    calendar.upcoming(2, after=date(2025, 1, 1))
+    assert años == [2025]
+
+def test_calendar_between():
+    calendar = HolidayCalendar(HolidayCache(fetch=lambda year: CALENDARIO))
+    rango = calendar.between(date(2025, 6, 17), date(2026, 6, 17))
+    assert [dia['fecha'] for dia in rango] == ['2025-06-17', '2025-11-20', '2025-12-25', '2026-01-01', '2026-06-17']
+    rango = calendar.between(date(2025, 1, 1), date(2026, 12, 31), 'INAMOVIBLE')
+    assert [dia['motivo'] for dia in rango] == ['Año Nuevo', 'Navidad'] * 2
+    with pytest.raises(ValueError):
+        calendar.between(date(2026, 1, 1), date(2025, 1, 1))
+    with pytest.raises(ValueError):
+        calendar.between(date(2025, 1, 1), date(2030, 1, 1))
@@ -0,0 +1,33 @@
+import pytest
+from rate_limit import AdmissionControl, MemoryBackend, RateLimiter, Rule
+
+
+def test_token_bucket_refills():
+    now = [0.0]
+    limiter = RateLimiter({'lento': Rule(rate=1, burst=2)}, Rule(rate=100, burst=100), clock=lambda: now[0])
+    assert limiter.check('lento', 'a') == 0
+    assert limiter.check('lento', 'a') == 0
+    assert limiter.check('lento', 'a') == pytest.approx(1.0)
+    now[0] = 0.5
+    assert limiter.check('lento', 'a') == pytest.approx(0.5)
+    now[0] = 1.0
+    assert limiter.check('lento', 'a') == 0
+    # Otros clientes y rutas no se ven afectados
+    assert limiter.check('lento', 'b') == 0
+    assert limiter.check('otra', 'a') == 0
+
+def test_backend_sweeps_idle_buckets():
+    backend = MemoryBackend(max_buckets=2)
+    rule = Rule(rate=1, burst=1)
+    backend.take('a', rule, 0)
+    backend.take('b', rule, 0)
+    backend.take('c', rule, 5)
+    assert set(backend._buckets) == {'c'}
+
+def test_admission_control():
+    admission = AdmissionControl(1)
+    assert admission.try_enter()
+    assert not admission.try_enter()
+    admission.leave()
+    assert admission.try_enter()
+    assert admission.rejected == 1
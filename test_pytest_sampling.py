@@ -0,0 +1,51 @@
+import random
+from collections import Counter
+import pytest
+from sampling import AliasTable, DenseIndex, PopularitySampler
+
+
+def test_dense_index_swap_remove():
+    index = DenseIndex()
+    for id in range(1, 6):
+        index.add(id)
+    index.add(3)
+    index.discard(2)
+    index.discard(5)
+    index.discard(99)
+    assert len(index) == 3
+    assert sorted(index) == [1, 3, 4]
+    assert 2 not in index
+    assert sorted(index.sample(10)) == [1, 3, 4]
+    assert index.sample(1)[0] in (1, 3, 4)
+
+def test_alias_table_respeta_pesos():
+    random.seed(1)
+    table = AliasTable([1, 2, 3], [1.0, 2.0, 7.0])
+    counts = Counter(table.draw() for _ in range(20000))
+    assert counts[3] / 20000 == pytest.approx(0.7, abs=0.02)
+    assert counts[1] / 20000 == pytest.approx(0.1, abs=0.02)
+
+def test_popularity_sampler():
+    ids = list(range(1, 101))
+    now = [0.0]
+    sampler = PopularitySampler(lambda genre: ids, refresh=10, clock=lambda: now[0])
+    for _ in range(1000):
+        sampler.record(7)
+
+    muestra = sampler.sample(5)
+    assert len(set(muestra)) == 5
+    assert 7 in muestra
+    assert sorted(sampler.sample(100)) == ids
+
+    # La tabla se reutiliza hasta que vence
+    ids.append(101)
+    assert 101 not in sampler.sample(101)
+    now[0] = 10
+    assert 101 in sampler.sample(101)
+
+def test_popularity_sampler_no_guarda_generos_vacios():
+    ids = {'drama': [1, 2, 3]}
+    sampler = PopularitySampler(lambda genre: list(ids.get(genre, [])))
+    assert sampler.sample(2, 'no existe') == []
+    assert len(sampler.sample(2, 'drama')) == 2
+    assert list(sampler._tables) == ['drama']
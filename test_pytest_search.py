@@ -0,0 +1,58 @@
+import pytest
+from search import TitleIndex
+
+TITLES = ['Indiana Jones', 'Star Wars', 'Interstellar', 'The Avengers',
+          'The Lord of the Rings', 'The Dark Knight', 'Fight Club']
+
+
+@pytest.fixture
+def index():
+    index = TitleIndex()
+    for id, title in enumerate(TITLES, start=1):
+        index.add(id, title)
+    return index
+
+@pytest.mark.parametrize('kw', ['th', 'E', 'the ', 'star', 'ING', 'of the r',
+                                'nte', 'xyz', 'Interstellar', 'rs'])
+def test_search_matches_substring_semantics(index, kw):
+    expected = [id for id, title in enumerate(TITLES, start=1)
+                if kw.lower() in title.lower()]
+    assert index.search(kw) == expected
+
+def test_short_titles_and_keywords():
+    index = TitleIndex()
+    index.add(1, 'Up')
+    index.add(2, 'Upgrade')
+    index.add(3, 'It')
+    assert index.search('up') == [1, 2]
+    assert index.search('t') == [3]
+    index.remove(1)
+    assert index.search('u') == [2]
+
+def test_search_limit(index):
+    assert index.search('the', limit=2) == [4, 5]
+    assert index.search('t', limit=1) == [2]
+
+def test_search_follows_writes(index):
+    index.add(2, 'Star Trek')
+    index.remove(3)
+    assert index.search('trek') == [2]
+    assert index.search('stell') == []
+
+@pytest.mark.parametrize('kw', ['th', 'e', 'the', 'ar', 'of the'])
+def test_pages_and_counts_follow_id_order(index, kw):
+    index.add(2, 'The Star Wars')
+    titles = dict(enumerate(TITLES, start=1))
+    titles[2] = 'The Star Wars'
+    expected = [id for id, title in sorted(titles.items()) if kw in title.lower()]
+    for after_id in range(len(TITLES) + 1):
+        pending = [id for id in expected if id > after_id]
+        assert index.search(kw, limit=2, after_id=after_id) == pending[:2]
+        assert index.count(kw, up_to_id=after_id) == len(expected) - len(pending)
+    assert index.count(kw) == len(expected)
+
+def test_search_is_lazy(index):
+    matches = index.iter_matches('the')
+    # Los ids salen de a uno y en orden, sin armar la lista entera
+    assert next(matches) == 4
+    assert next(matches) == 5
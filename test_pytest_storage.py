@@ -0,0 +1,126 @@
+import sqlite3
+import threading
+import pytest
+import storage as storage_module
+from catalog import MovieCatalog
+from movie import Movie
+from storage import SQLiteStorage
+
+SEED = [
+    {'id': 1, 'titulo': 'Indiana Jones', 'genero': 'Acción'},
+    {'id': 2, 'titulo': 'Star Wars', 'genero': 'Acción'},
+]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'peliculas.db')
+
+def test_catalog_survives_restart(db_path):
+    storage = SQLiteStorage(db_path)
+    catalog = MovieCatalog(SEED, storage=storage)
+    catalog.add('Inception', 'Ciencia ficción')
+    catalog.update(1, 'Nuevo título', 'Comedia')
+    catalog.remove(3)
+    storage.close()
+
+    # El seed se ignora cuando ya hay datos guardados
+    catalog = MovieCatalog([{'id': 1, 'titulo': 'Otro', 'genero': 'Drama'}],
+                           storage=SQLiteStorage(db_path))
+    assert catalog.all() == [
+        Movie(1, 'Nuevo título', 'Comedia'),
+        Movie(2, 'Star Wars', 'Acción'),
+    ]
+    assert catalog.by_genre('comedia')[0].id == 1
+    # El id 3 no se reutiliza aunque se haya borrado
+    assert catalog.next_id() == 4
+
+def test_concurrent_writes_are_group_committed(db_path):
+    storage = SQLiteStorage(db_path)
+
+    def write(n):
+        storage.insert_many([Movie(storage.allocate_ids(1), f'Pelicula {n}', 'Drama')])
+
+    threads = [threading.Thread(target=write, args=(n,)) for n in range(100)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    storage.close()
+    movies, next_id = storage.load()
+    assert sorted(movie.id for movie in movies) == list(range(1, 101))
+    # Al cerrar se devuelve lo que quedaba del bloque de ids reservado
+    assert next_id == 101
+
+def test_workers_sharing_a_file_never_share_ids(db_path):
+    primero = MovieCatalog(SEED, storage=SQLiteStorage(db_path))
+    segundo = MovieCatalog(SEED, storage=SQLiteStorage(db_path))
+    a = primero.add('Inception', 'Ciencia ficción')
+    b = segundo.add('Fight Club', 'Drama')
+    c = primero.add_many([('Up', 'Animación'), ('Heat', 'Crimen')])
+    assert len({a.id, b.id} | {movie.id for movie in c}) == 4
+    primero._storage.close()
+    segundo._storage.close()
+    movies, _ = SQLiteStorage(db_path).load()
+    assert {movie.titulo for movie in movies} >= {'Inception', 'Fight Club', 'Up', 'Heat'}
+
+def test_clashing_insert_fails_loudly(db_path):
+    storage = SQLiteStorage(db_path)
+    storage.insert_many([Movie(1, 'Indiana Jones', 'Acción')])
+    with pytest.raises(RuntimeError):
+        storage.insert_many([Movie(1, 'Otra', 'Drama')])
+    movies, _ = storage.load()
+    assert movies == [Movie(1, 'Indiana Jones', 'Acción')]
+
+def test_ids_are_reserved_in_blocks(db_path, monkeypatch):
+    monkeypatch.setattr(storage_module, 'ID_BLOCK', 10)
+    primero, segundo = SQLiteStorage(db_path), SQLiteStorage(db_path)
+    assert [primero.allocate_ids(1) for _ in range(3)] == [1, 2, 3]
+    assert segundo.allocate_ids(2) == 11
+    assert primero.allocate_ids(7) == 4
+    assert primero.allocate_ids(1) == 21
+    primero.close()
+    segundo.close()
+
+def test_transient_errors_are_retried(db_path, monkeypatch):
+    monkeypatch.setattr(storage_module, 'RETRY_DELAY', 0)
+    apply = SQLiteStorage._apply
+    errores = [sqlite3.OperationalError('database is locked')] * 2
+
+    def flaky(connection, batch):
+        if errores:
+            raise errores.pop()
+        apply(connection, batch)
+    monkeypatch.setattr(SQLiteStorage, '_apply', staticmethod(flaky))
+    catalog = MovieCatalog(SEED, storage=SQLiteStorage(db_path))
+    catalog.add('Inception', 'Ciencia ficción')
+    assert catalog._storage.failures == 0
+    movies, _ = catalog._storage.load()
+    assert [movie.titulo for movie in movies][-1] == 'Inception'
+
+@pytest.mark.parametrize('wait', [True, False])
+def test_catalog_drops_writes_the_storage_lost(db_path, monkeypatch, wait):
+    apply = SQLiteStorage._apply
+
+    def failing(connection, batch):
+        if any(operation[0] == 'insert' and operation[2] == 'Perdida' for operation in batch):
+            raise sqlite3.IntegrityError('constraint failed')
+        apply(connection, batch)
+    monkeypatch.setattr(SQLiteStorage, '_apply', staticmethod(failing))
+    catalog = MovieCatalog(SEED, storage=SQLiteStorage(db_path, wait=wait))
+    version = catalog.version()
+    if wait:
+        with pytest.raises(RuntimeError):
+            catalog.add('Perdida', 'Drama')
+    else:
+        catalog.add('Perdida', 'Drama')
+        with pytest.raises(RuntimeError):
+            catalog._storage.flush()
+    # El writer sigue andando y el catalogo vuelve a lo guardado
+    catalog.add('Guardada', 'Drama')
+    catalog._storage.flush()
+    assert catalog.version() > version
+    assert catalog.search_title('perdida') == []
+    assert [movie.titulo for movie in catalog] == ['Indiana Jones', 'Star Wars', 'Guardada']
+    movies, _ = catalog._storage.load()
+    assert [movie.titulo for movie in movies] == ['Indiana Jones', 'Star Wars', 'Guardada']